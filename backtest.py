@@ -1,25 +1,62 @@
 import pandas as pd
 import numpy as np
 
-def backtest_signals(signals_df, price_df, fee=0.001, initial_capital=1000.0):
+from panel import join_on_timestamp
+from profiling import stage
+from signals import BUY, HOLD, SELL, decode, encode
+
+ENGINES = ("vectorized", "loop", "position", "position_loop")
+
+
+def backtest_signals(signals_df, price_df, fee=0.001, initial_capital=1000.0, engine="vectorized"):
     """
     Simulates trading using signals and calculates performance metrics.
-    
+
     Parameters:
-    - signals_df: DataFrame with ['timestamp', 'signal']
+    - signals_df: DataFrame with ['timestamp', 'signal'] and optionally 'position_size'
     - price_df: DataFrame with ['timestamp', 'close']
     - fee: Transaction fee per trade side (default 0.1%)
     - initial_capital: Starting capital in USDT
+    - engine: 'vectorized' (NumPy, default) or 'loop' (row-by-row reference),
+      both long-only with SELL as the exit; or 'position' for long/short
+      trades sized by 'position_size' (see _simulate_position), with
+      'position_loop' as its row-by-row reference
 
     Returns:
     - DataFrame with capital over time
     - Dict with final return, Sharpe Ratio, Max Drawdown
     """
-    df = pd.merge(signals_df, price_df[['timestamp', 'close']], on='timestamp', how='inner').copy()
-    df['position'] = 0
-    df['cash'] = initial_capital
-    df['holdings'] = 0.0
-    df['capital'] = initial_capital
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'. Expected one of {ENGINES}.")
+
+    with stage("backtest.merge"):
+        # Signals travel as int8 codes through the merge and come back out as a categorical;
+        # signals cut from the same candles skip the hash-merge entirely
+        codes = signals_df.drop(columns='signal').assign(code=encode(signals_df['signal']))
+        df = join_on_timestamp(codes, price_df[['timestamp', 'close']])
+        df.insert(1, 'signal', decode(df.pop('code')))
+        df['position'] = 0
+        df['cash'] = initial_capital
+        df['holdings'] = 0.0
+        df['capital'] = initial_capital
+
+    with stage(f"backtest.simulate_{engine}"):
+        if engine == "loop":
+            _simulate_loop(df, fee)
+        elif engine == "position":
+            _simulate_position(df, fee, initial_capital)
+        elif engine == "position_loop":
+            _simulate_position_loop(df, fee, initial_capital)
+        else:
+            _simulate_vectorized(df, fee, initial_capital)
+
+    with stage("backtest.metrics"):
+        metrics = compute_metrics(df, initial_capital)
+    return df, metrics
+
+
+def _simulate_loop(df, fee):
+    """Reference implementation: walks the frame one bar at a time."""
     in_position = False
 
     for i in range(1, len(df)):
@@ -48,6 +85,185 @@ def backtest_signals(signals_df, price_df, fee=0.001, initial_capital=1000.0):
             df.at[df.index[i], 'cash'] + df.at[df.index[i], 'holdings'] * price
         )
 
+
+def position_state(signals):
+    """
+    Turns a BUY/SELL/HOLD array (strings or int8 codes) into a boolean
+    long/flat state per bar.
+
+    A BUY while flat opens a position and a SELL while long closes it, so the
+    state is simply the last non-HOLD signal carried forward. Bar 0 is always
+    flat, matching the reference loop which starts trading on bar 1.
+    """
+    codes = encode(signals)
+    action = np.full(codes.shape, -1, dtype=np.int8)
+    action[codes == BUY] = 1
+    action[codes == SELL] = 0
+    action[..., 0] = 0
+
+    idx = np.where(action >= 0, np.arange(codes.shape[-1]), 0)
+    idx = np.maximum.accumulate(idx, axis=-1)
+    return np.take_along_axis(action, idx, axis=-1) == 1
+
+
+def _simulate_vectorized(df, fee, initial_capital):
+    """Fills cash/holdings/capital from the position state with array ops."""
+    price = df['close'].to_numpy(dtype=float)
+    in_pos = position_state(df['signal'])
+
+    was_in_pos = np.r_[False, in_pos[:-1]]
+    entry_idx = np.flatnonzero(in_pos & ~was_in_pos)
+    exit_idx = np.flatnonzero(~in_pos & was_in_pos)
+
+    # Cash available before each trade compounds over the closed round trips
+    closed = len(exit_idx)
+    trade_growth = (1 - fee) * (1 - fee) * price[exit_idx] / price[entry_idx[:closed]]
+    cash_before = initial_capital * np.r_[1.0, np.cumprod(trade_growth)]
+    shares = (cash_before[:len(entry_idx)] * (1 - fee)) / price[entry_idx]
+
+    # Index 0 means "no trade opened yet"; a trailing 0.0 covers an open last trade
+    trades_opened = np.cumsum(in_pos & ~was_in_pos)
+    holdings = np.where(in_pos, np.r_[0.0, shares][trades_opened], 0.0)
+    cash = np.where(in_pos, 0.0, np.r_[cash_before, 0.0][trades_opened])
+
+    df['cash'] = cash
+    df['holdings'] = holdings
+    df['capital'] = cash + holdings * price
+
+
+def position_path(signals):
+    """
+    Turns a BUY/SELL/HOLD array (strings or int8 codes) into a signed
+    long/short/flat state per bar: 1, -1 or 0 (int8).
+
+    From flat, BUY opens a long and SELL opens a short; while long, SELL
+    closes and BUY is ignored; while short, BUY covers and SELL is ignored.
+    Bar 0 is always flat, as in position_state.
+
+    Only the first two signals of a run of equal signals can change the
+    state, so the state is solved per run: a run whose first signal closes
+    a trade reopens on its second signal, which leaves the next run in a
+    position again; a run of one closing signal leaves it flat. That makes
+    "in a position at the start of run r" alternate between resets, which
+    is a parity computation rather than a loop.
+    """
+    codes = encode(signals).copy()
+    codes[:1] = HOLD
+    state = np.zeros(len(codes), dtype=np.int8)
+    events = np.flatnonzero(codes != HOLD)
+    if not len(events):
+        return state
+
+    side = codes[events]
+    run_start = np.r_[True, side[1:] != side[:-1]]
+    run_id = np.cumsum(run_start) - 1
+    long_run = np.bincount(run_id) >= 2
+
+    # The first run starts flat; a run after a run of 2+ signals starts in a position
+    runs = np.arange(len(long_run))
+    reset = np.r_[True, long_run[:-1]]
+    last_reset = np.maximum.accumulate(np.where(reset, runs, 0))
+    in_position = (last_reset > 0) ^ ((runs - last_reset) % 2 == 1)
+
+    state[events] = np.where(run_start & in_position[run_id], 0, side)
+    last_event = np.maximum.accumulate(np.where(codes != HOLD, np.arange(len(codes)), 0))
+    return state[last_event]
+
+
+def _simulate_position(df, fee, initial_capital):
+    """
+    Long/short engine with fractional sizing, filled with array ops.
+
+    Each trade commits position_size (taken on its entry bar, default 1.0)
+    of the equity at entry; the rest stays in cash. The fee is charged on
+    the traded notional on entry and on exit. A long holds the shares
+    bought; a short holds the mirror image, so both trades are worth
+    notional * (1 + side * (price / entry_price - 1)) while open. Equity
+    compounds across closed trades with a cumulative product, and each
+    bar's capital is the open trade's position times its price return.
+    """
+    price = df['close'].to_numpy(dtype=float)
+    size = (df['position_size'].fillna(1.0).to_numpy(dtype=float) if 'position_size' in df
+            else np.ones(len(df)))
+    side = position_path(df['signal'])
+
+    prev = np.r_[0, side[:-1]]
+    entry_idx = np.flatnonzero((side != 0) & (prev == 0))
+    exit_idx = np.flatnonzero((side == 0) & (prev != 0))
+
+    trade_side, trade_size, entry_price = side[entry_idx], size[entry_idx], price[entry_idx]
+    closed = len(exit_idx)
+    # The exit fee is charged on the shares traded at the exit price, for longs and shorts alike
+    price_ratio = price[exit_idx] / entry_price[:closed]
+    leg_growth = 1 + trade_side[:closed] * (price_ratio - 1) - fee * price_ratio
+    trade_growth = 1 - trade_size[:closed] + trade_size[:closed] * (1 - fee) * leg_growth
+    equity_before = initial_capital * np.r_[1.0, np.cumprod(trade_growth)]
+
+    # Shares per trade (negative for shorts); a short's sale proceeds sit in cash
+    equity_at_entry = equity_before[:len(entry_idx)]
+    shares = trade_size * equity_at_entry * (1 - fee) / entry_price
+    trade_cash = (1 - trade_size) * equity_at_entry + np.where(trade_side < 0, 2 * shares * entry_price, 0.0)
+
+    # Flat bars read the equity after the trades closed so far; a trailing 0.0 covers an open last trade
+    trades_opened = np.cumsum((side != 0) & (prev == 0))
+    in_pos = side != 0
+    trade = np.maximum(trades_opened - 1, 0)
+    holdings = np.where(in_pos, np.r_[trade_side * shares, 0.0][trade], 0.0)
+    cash = np.where(in_pos, np.r_[trade_cash, 0.0][trade], np.r_[equity_before, 0.0][trades_opened])
+
+    df['position'] = np.where(in_pos, np.r_[trade_side * trade_size, 0.0][trade], 0.0)
+    df['cash'] = cash
+    df['holdings'] = holdings
+    df['capital'] = cash + holdings * price
+
+
+def _simulate_position_loop(df, fee, initial_capital):
+    """Reference implementation of the position engine: one bar at a time, no shortcuts."""
+    signals = df['signal'].to_numpy()
+    price = df['close'].to_numpy(dtype=float)
+    size = (df['position_size'].fillna(1.0).to_numpy(dtype=float) if 'position_size' in df
+            else np.ones(len(df)))
+    side, shares, cash = 0, 0.0, initial_capital
+    sides, cash_out, holdings_out = np.zeros(len(df)), np.empty(len(df)), np.empty(len(df))
+
+    for i in range(len(df)):
+        action = BUY if signals[i] == 'BUY' else SELL if signals[i] == 'SELL' else HOLD
+        if i > 0 and side == 0 and action != HOLD:
+            # Open: commit size * equity, paying the fee on the way in
+            equity = cash
+            side = action
+            shares = size[i] * equity * (1 - fee) / price[i]
+            cash = equity - size[i] * equity
+            if side == SELL:
+                # Short sale proceeds plus the committed collateral sit in cash
+                cash += 2 * shares * price[i]
+            sides[i] = side * size[i]
+        elif side != 0 and action == -side:
+            # Close: buy back or sell the shares, paying the fee on the exit notional
+            cash += side * shares * price[i] - fee * shares * price[i]
+            side, shares = 0, 0.0
+        elif side != 0:
+            sides[i] = sides[i - 1]
+        cash_out[i] = cash
+        holdings_out[i] = side * shares
+
+    df['position'] = sides
+    df['cash'] = cash_out
+    df['holdings'] = holdings_out
+    df['capital'] = cash_out + holdings_out * price
+
+
+def compute_metrics(df, initial_capital):
+    """
+    Headline metrics of a capital curve.
+
+    Parameters:
+    - df: DataFrame with a 'capital' column (a 'returns' column is added)
+    - initial_capital: starting capital the return is measured from
+
+    Returns:
+    - dict with final_capital, final_return_pct, sharpe_ratio and max_drawdown_pct
+    """
     # Daily returns
     df['returns'] = df['capital'].pct_change().fillna(0)
 
@@ -56,11 +272,144 @@ def backtest_signals(signals_df, price_df, fee=0.001, initial_capital=1000.0):
     sharpe_ratio = df['returns'].mean() / df['returns'].std() if df['returns'].std() > 0 else 0
     max_drawdown = ((df['capital'].cummax() - df['capital']) / df['capital'].cummax()).max() * 100
 
-    metrics = {
+    return {
         'final_capital': round(df['capital'].iloc[-1], 2),
         'final_return_pct': round(final_return_pct, 2),
         'sharpe_ratio': round(sharpe_ratio, 4),
         'max_drawdown_pct': round(max_drawdown, 2)
     }
 
-    return df, metrics
+
+def stack_signals(signals_by_name):
+    """
+    Stacks several signals DataFrames into one (variants x bars) matrix.
+
+    Parameters:
+    - signals_by_name: dict of name -> DataFrame with ['timestamp', 'signal']
+
+    Returns:
+    - list of variant names
+    - array of timestamps shared by every variant
+    - 2-D int8 array of signal codes, one row per variant
+    """
+    names = list(signals_by_name)
+    frames = [signals_by_name[name] for name in names]
+    timestamps = frames[0]['timestamp']
+    for frame in frames[1:]:
+        timestamps = timestamps[timestamps.isin(frame['timestamp'])]
+    index = pd.Index(timestamps)
+
+    matrix = np.empty((len(frames), len(index)), dtype=np.int8)
+    for row, frame in enumerate(frames):
+        pos = pd.Index(frame['timestamp']).get_indexer(index)
+        matrix[row] = encode(frame['signal'])[pos]
+    return names, index.to_numpy(), matrix
+
+
+def backtest_batch(signal_matrix, timestamps, price_df, fee=0.001, initial_capital=1000.0, names=None):
+    """
+    Backtests many signal variants against one price series in a single pass.
+
+    Parameters:
+    - signal_matrix: 2-D array (variants x bars) of 'BUY'/'SELL'/'HOLD' or int8 codes
+    - timestamps: 1-D array of the timestamps of the signal columns
+    - price_df: DataFrame with ['timestamp', 'close']
+    - fee: Transaction fee per trade side (default 0.1%)
+    - initial_capital: Starting capital in USDT
+    - names: Optional variant labels used as the metrics index
+
+    Returns:
+    - 2-D array of capital over time (variants x aligned bars)
+    - DataFrame of metrics, one row per variant
+    - Array of the aligned timestamps
+    """
+    signal_matrix = np.atleast_2d(encode(signal_matrix))
+    if signal_matrix.shape[1] != len(timestamps):
+        raise ValueError("signal_matrix must have one column per timestamp")
+
+    # Align once: keep signal columns that have a price, in signal order
+    pos = pd.Index(price_df['timestamp']).get_indexer(pd.Index(timestamps))
+    keep = pos >= 0
+    price = price_df['close'].to_numpy(dtype=float)[pos[keep]]
+    signals = signal_matrix[:, keep]
+
+    in_pos = position_state(signals)
+    was_in_pos = np.zeros_like(in_pos)
+    was_in_pos[:, 1:] = in_pos[:, :-1]
+
+    price_ratio = np.ones_like(price)
+    price_ratio[1:] = price[1:] / price[:-1]
+    growth = np.where(was_in_pos, price_ratio, 1.0)
+    growth = np.where(in_pos != was_in_pos, growth * (1 - fee), growth)
+    capital = initial_capital * np.cumprod(growth, axis=1)
+
+    metrics = batch_metrics(capital, initial_capital)
+    if names is not None:
+        metrics.index = pd.Index(names, name='variant')
+    return capital, metrics, np.asarray(timestamps)[keep]
+
+
+def batch_metrics(capital, initial_capital=1000.0):
+    """Computes the backtest_signals metrics for every row of a capital matrix."""
+    capital = np.atleast_2d(capital)
+    returns = np.zeros_like(capital)
+    returns[:, 1:] = capital[:, 1:] / capital[:, :-1] - 1
+
+    std = returns.std(axis=1, ddof=1) if capital.shape[1] > 1 else np.zeros(len(capital))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, returns.mean(axis=1) / std, 0.0)
+    peak = np.maximum.accumulate(capital, axis=1)
+    max_drawdown = ((peak - capital) / peak).max(axis=1) * 100
+
+    return pd.DataFrame({
+        'final_capital': np.round(capital[:, -1], 2),
+        'final_return_pct': np.round((capital[:, -1] - initial_capital) / initial_capital * 100, 2),
+        'sharpe_ratio': np.round(sharpe, 4),
+        'max_drawdown_pct': np.round(max_drawdown, 2)
+    })
+
+
+def check_equivalence(signals_df, price_df, name="signals", engine="vectorized", reference="loop", fee=0.001,
+                      verbose=True):
+    """Returns True when `engine` reproduces the capital curve and metrics of the `reference` engine."""
+    expected, expected_metrics = backtest_signals(signals_df, price_df, fee=fee, engine=reference)
+    actual, actual_metrics = backtest_signals(signals_df, price_df, fee=fee, engine=engine)
+    same = (actual_metrics == expected_metrics
+            and np.allclose(actual['capital'].to_numpy(), expected['capital'].to_numpy(), rtol=1e-9))
+    if verbose or not same:
+        print(f"{'✅' if same else '❌'} {name}: {engine} engine {'matches' if same else 'differs from'} {reference}")
+    return same
+
+
+def random_signals(price_df, rng, n_bars=None, density=0.2):
+    """Random BUY/SELL/HOLD frame (with position_size) over a random stretch of price_df."""
+    n_bars = n_bars or int(rng.integers(2, 300))
+    start = int(rng.integers(0, len(price_df) - n_bars + 1))
+    prices = price_df.iloc[start:start + n_bars].reset_index(drop=True)
+    codes = np.where(rng.random(n_bars) < density, rng.choice([SELL, BUY], n_bars), 0)
+    signals = pd.DataFrame({'timestamp': prices['timestamp'], 'signal': decode(codes),
+                            'position_size': rng.uniform(0.1, 1.0, n_bars)})
+    return signals, prices
+
+
+if __name__ == "__main__":
+    from data_cache import load_candles
+    from exit_kernel import VECTORIZED
+
+    candles_target, candles_anchor = load_candles()
+    for name, generate_signals in VECTORIZED.items():
+        check_equivalence(generate_signals(candles_target, candles_anchor), candles_target, name)
+
+    rng = np.random.default_rng(0)
+    n_random = 200
+    matched = sum(check_equivalence(*random_signals(candles_target, rng), verbose=False) for _ in range(n_random))
+    print(f"{'✅' if matched == n_random else '❌'} {matched}/{n_random} random signal sequences: "
+          f"vectorized engine matches loop")
+
+    for name, generate_signals in VECTORIZED.items():
+        check_equivalence(generate_signals(candles_target, candles_anchor), candles_target, name,
+                          engine="position", reference="position_loop")
+    matched = sum(check_equivalence(*random_signals(candles_target, rng), engine="position",
+                                    reference="position_loop", verbose=False) for _ in range(n_random))
+    print(f"{'✅' if matched == n_random else '❌'} {matched}/{n_random} random signal sequences: "
+          f"position engine matches position_loop")
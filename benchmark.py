@@ -0,0 +1,205 @@
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from backtest import backtest_signals
+from exit_kernel import VECTORIZED
+
+SIZES = (3_000, 30_000, 300_000, 3_000_000)
+STRATEGIES = ("strategy", "strategy1", "strategy2", "strategy3", "strategy4", "strategy5", "strategy6")
+HISTORY_PATH = "benchmark_history.json"
+WINDOW_START = pd.Timestamp("2025-01-01")
+WINDOW_END = pd.Timestamp("2025-05-09")
+
+
+def synthetic_candles(n_bars, target="LTC", anchors=("BTC", "ETH"), seed=0):
+    """
+    Deterministic synthetic OHLCV for a target and its anchors.
+
+    Anchors are random walks; the target follows the anchors' average return
+    with a one-bar lag plus its own noise, so lagged-anchor rules actually
+    fire. Bars are hourly when they fit in the official window and are
+    otherwise spaced evenly across it, because some strategies filter rows
+    to that window.
+
+    Returns:
+    - candles_target with plain OHLCV columns
+    - candles_anchor with '<field>_<SYMBOL>' columns for every anchor
+    """
+    rng = np.random.default_rng(seed)
+    step = min(pd.Timedelta(hours=1), (WINDOW_END - pd.Timedelta(hours=1) - WINDOW_START) / max(n_bars, 1))
+    timestamps = (WINDOW_START + np.arange(n_bars) * step).astype("datetime64[ms]")
+
+    def ohlcv(log_returns, price0):
+        close = price0 * np.exp(np.cumsum(log_returns))
+        open_ = np.r_[price0, close[:-1]]
+        wick = np.abs(rng.normal(0, 0.003, (2, n_bars)))
+        return {
+            "open": open_,
+            "high": np.maximum(open_, close) * (1 + wick[0]),
+            "low": np.minimum(open_, close) * (1 - wick[1]),
+            "close": close,
+            "volume": rng.lognormal(10, 0.5, n_bars),
+        }
+
+    anchor_returns = rng.normal(0, 0.006, (len(anchors), n_bars))
+    lead = np.r_[0.0, anchor_returns.mean(axis=0)[:-1]]
+    target_returns = 0.6 * lead + rng.normal(0, 0.005, n_bars)
+
+    candles_target = pd.DataFrame({"timestamp": timestamps, **ohlcv(target_returns, 100.0)})
+    candles_anchor = pd.DataFrame({"timestamp": timestamps})
+    for i, symbol in enumerate(anchors):
+        for field, values in ohlcv(anchor_returns[i], 1000.0 * (i + 1)).items():
+            candles_anchor[f"{field}_{symbol}"] = values
+    return candles_target, candles_anchor
+
+
+def resolve(name):
+    """'strategy1' -> its generate_signals; 'vectorized:strategy1' -> the exit-kernel version."""
+    if name.startswith("vectorized:"):
+        return VECTORIZED[name.split(":", 1)[1]]
+    return importlib.import_module(name).generate_signals
+
+
+def peak_memory_mb(fn, *args):
+    """Runs fn once under tracemalloc and returns its peak traced memory (MB)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracemalloc.start()
+        try:
+            fn(*args)
+            return tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+
+
+def _measure(fn, *args, memory=True):
+    """Runs fn twice: once for wall time, once under tracemalloc for peak memory (MB)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - start
+    peak_mb = peak_memory_mb(fn, *args) if memory else np.nan
+    return result, elapsed, peak_mb
+
+
+def run_benchmarks(strategies=STRATEGIES, sizes=SIZES, vectorized=True, max_seconds=120.0, memory=True, seed=0):
+    """
+    Times generate_signals and backtest_signals at increasing bar counts.
+
+    A strategy skips the remaining sizes once its extrapolated run time
+    (linear in bars) would exceed `max_seconds`, so the 3M-bar runs only
+    happen for implementations that can finish them.
+
+    Parameters:
+    - strategies: module names; with vectorized=True the exit-kernel
+      versions are benchmarked as 'vectorized:<name>' as well
+    - sizes: bar counts
+    - memory: also record tracemalloc peak memory (one extra run per stage)
+
+    Returns:
+    - DataFrame with one row per (strategy, bars)
+    """
+    names = list(strategies) + ([f"vectorized:{s}" for s in strategies if s in VECTORIZED] if vectorized else [])
+    rows = []
+    for n_bars in sorted(sizes):
+        candles_target, candles_anchor = synthetic_candles(n_bars, seed=seed)
+        for name in names:
+            previous = [r for r in rows if r["strategy"] == name]
+            if previous and previous[-1]["total_s"] * n_bars / previous[-1]["bars"] > max_seconds:
+                print(f"⏭️ {name} @ {n_bars:,} bars skipped (extrapolated > {max_seconds:.0f}s)")
+                continue
+
+            generate_signals = resolve(name)
+            try:
+                signals, signals_s, signals_mb = _measure(
+                    generate_signals, candles_target.copy(), candles_anchor.copy(), memory=memory)
+                _, backtest_s, backtest_mb = _measure(
+                    backtest_signals, signals[["timestamp", "signal"]], candles_target, memory=memory)
+            except Exception as e:
+                print(f"❌ {name} @ {n_bars:,} bars failed: {e}")
+                continue
+
+            total = signals_s + backtest_s
+            rows.append({
+                "strategy": name,
+                "bars": n_bars,
+                "signals_s": signals_s,
+                "backtest_s": backtest_s,
+                "total_s": total,
+                "bars_per_s": n_bars / total if total > 0 else np.inf,
+                "signals_peak_mb": signals_mb,
+                "backtest_peak_mb": backtest_mb,
+            })
+            print(f"✅ {name} @ {n_bars:,} bars: signals {signals_s:.3f}s, backtest {backtest_s:.3f}s, "
+                  f"{rows[-1]['bars_per_s']:,.0f} bars/s")
+    return pd.DataFrame(rows)
+
+
+def load_history(path=HISTORY_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, history, tolerance=0.2):
+    """
+    Flags rows whose bars/second dropped by more than `tolerance` versus the
+    most recent previous run that measured the same (strategy, bars).
+    """
+    results = results.copy()
+    previous = {}
+    for run in history:
+        for row in run["results"]:
+            previous[(row["strategy"], row["bars"])] = row["bars_per_s"]
+
+    results["prev_bars_per_s"] = [previous.get((s, b), np.nan) for s, b in zip(results["strategy"], results["bars"])]
+    results["change_pct"] = (results["bars_per_s"] / results["prev_bars_per_s"] - 1) * 100
+    results["regression"] = results["change_pct"] < -tolerance * 100
+    return results
+
+
+def record(results, path=HISTORY_PATH):
+    """Appends this run (with environment details) to the JSON history file."""
+    history = load_history(path)
+    history.append({
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "results": results[["strategy", "bars", "signals_s", "backtest_s", "total_s", "bars_per_s",
+                            "signals_peak_mb", "backtest_peak_mb"]].to_dict(orient="records"),
+    })
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(history, f, indent=2, default=float)
+    os.replace(tmp, path)
+
+
+def main(path=HISTORY_PATH, tolerance=0.2, **kwargs):
+    results = compare(run_benchmarks(**kwargs), load_history(path), tolerance)
+    record(results, path)
+
+    print("\n📊 Benchmark results")
+    print(results.to_string(index=False, float_format=lambda v: f"{v:,.3f}"))
+    regressions = results[results["regression"]]
+    if len(regressions):
+        print(f"\n❌ {len(regressions)} regressions (> {tolerance:.0%} slower than the previous run):")
+        print(regressions[["strategy", "bars", "bars_per_s", "prev_bars_per_s", "change_pct"]].to_string(index=False))
+    else:
+        print("\n✅ No bars/second regressions against the previous run")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+from backtest import position_path, position_state
+from indicators import atr
+from metrics import equity_metrics
+from panel import join_on_timestamp
+from signals import encode
+
+FEES = (0.0, 0.0005, 0.001, 0.002, 0.004)
+SLIPPAGES = (0.0, 0.0005, 0.001, 0.002)
+ATR_SLIPPAGES = (0.0, 0.05, 0.1, 0.25, 0.5)
+SLIPPAGE_MODELS = ("pct", "atr")
+
+
+def _bar_slippage(df, model, atr_window):
+    """Slippage per unit of the grid level on each bar: 1.0 ('pct') or ATR / close ('atr')."""
+    if model == "pct":
+        return np.ones(len(df))
+    high, low = df['high'].to_numpy(dtype=float), df['low'].to_numpy(dtype=float)
+    ranges = atr(high, low, atr_window)
+    # Bars before the first full ATR window use their own high-low range
+    ranges = np.where(np.isnan(ranges), high - low, ranges)
+    return ranges / df['close'].to_numpy(dtype=float)
+
+
+def cost_grid(signals_df, price_df, fees=FEES, slippages=SLIPPAGES, slippage_model="pct", atr_window=14,
+              engine="vectorized", initial_capital=1000.0, timeframe="1H"):
+    """
+    Backtests one signal set under every (fee, slippage) pair in one pass.
+
+    Signals and prices are aligned once and the trades are found once; the
+    cost levels are a leading axis that every trade array broadcasts
+    against, so the whole grid is one set of (levels x trades) and
+    (levels x bars) array operations.
+
+    Parameters:
+    - signals_df: DataFrame with ['timestamp', 'signal'] and optionally 'position_size'
+    - price_df: DataFrame with ['timestamp', 'close'] (+ 'high', 'low' for the ATR model)
+    - fees: fee levels per trade side, as a fraction of the traded notional
+    - slippages: slippage levels per fill; a fraction of the price for
+      slippage_model='pct', a multiple of the ATR (mean high-low range over
+      atr_window bars) for slippage_model='atr'. Fills are moved against
+      the trade: longs buy higher and sell lower, shorts the reverse.
+    - engine: 'vectorized' (long-only, full size, as backtest_signals'
+      default) or 'position' (long/short with position_size)
+    - timeframe: used to annualize the metrics
+
+    Returns:
+    - DataFrame with fee, slippage and the equity_metrics columns, one row
+      per pair (fee-major order)
+    - 2-D capital array, one row per pair
+
+    With zero slippage each row matches backtest_signals' capital curve
+    at that fee.
+    """
+    if slippage_model not in SLIPPAGE_MODELS:
+        raise ValueError(f"Unknown slippage_model '{slippage_model}'. Expected one of {SLIPPAGE_MODELS}.")
+    columns = ['timestamp', 'close'] + (['high', 'low'] if slippage_model == "atr" else [])
+    df = join_on_timestamp(signals_df, price_df[columns])
+    price = df['close'].to_numpy(dtype=float)
+    codes = encode(df['signal'])
+
+    if engine == "position":
+        side = position_path(codes)
+        size = (df['position_size'].fillna(1.0).to_numpy(dtype=float) if 'position_size' in df
+                else np.ones(len(df)))
+    else:
+        side = position_state(codes).astype(np.int8)
+        size = np.ones(len(df))
+    bar_slippage = _bar_slippage(df, slippage_model, atr_window)
+
+    fee, slippage = (level.reshape(-1, 1) for level in np.meshgrid(fees, slippages, indexing='ij'))
+
+    prev = np.r_[0, side[:-1]]
+    entry_idx = np.flatnonzero((side != 0) & (prev == 0))
+    exit_idx = np.flatnonzero((side == 0) & (prev != 0))
+    closed = len(exit_idx)
+    trade_side, trade_size = side[entry_idx], size[entry_idx]
+
+    # Fill prices per (level, trade): adverse by the slippage on the fill bar
+    entry_fill = price[entry_idx] * (1 + trade_side * slippage * bar_slippage[entry_idx])
+    exit_fill = price[exit_idx] * (1 - trade_side[:closed] * slippage * bar_slippage[exit_idx])
+    ratio = exit_fill / entry_fill[:, :closed]
+    leg_growth = 1 + trade_side[:closed] * (ratio - 1) - fee * ratio
+    trade_growth = 1 - trade_size[:closed] + trade_size[:closed] * (1 - fee) * leg_growth
+    equity_before = initial_capital * np.cumprod(np.c_[np.ones(len(fee)), trade_growth], axis=1)
+
+    # Open bars mark the trade to the close; flat bars hold the equity after the trades closed so far
+    trades_opened = np.cumsum((side != 0) & (prev == 0))
+    in_pos = side != 0
+    trade = np.maximum(trades_opened - 1, 0)
+    pad = np.zeros((len(fee), 1))
+    open_equity = np.c_[equity_before[:, :len(entry_idx)], pad][:, trade]
+    open_fill = np.c_[entry_fill, pad + 1.0][:, trade]
+    open_side, open_size = np.r_[trade_side, 0][trade], np.r_[trade_size, 0.0][trade]
+    marked = open_equity * (1 - open_size + open_size * (1 - fee) * (1 + open_side * (price / open_fill - 1)))
+    capital = np.where(in_pos, marked, np.c_[equity_before, pad][:, trades_opened])
+
+    position = np.where(in_pos, open_side * open_size, 0.0)
+    metrics = equity_metrics(capital, np.broadcast_to(position, capital.shape), timeframe, initial_capital)
+    metrics.insert(0, 'fee', fee.ravel())
+    metrics.insert(1, 'slippage', slippage.ravel())
+    return metrics, capital
+
+
+if __name__ == "__main__":
+    from data_cache import load_candles
+    from exit_kernel import VECTORIZED
+
+    candles_target, candles_anchor = load_candles()
+    for engine in ("vectorized", "position"):
+        rows = []
+        for name, generate_signals in VECTORIZED.items():
+            signals = generate_signals(candles_target, candles_anchor)
+            metrics, _ = cost_grid(signals, candles_target, slippages=ATR_SLIPPAGES, slippage_model="atr",
+                                   engine=engine)
+            rows.append(metrics.assign(strategy=name))
+        grid = pd.concat(rows)
+        table = grid.pivot_table(index=["strategy", "slippage"], columns="fee", values="total_return_pct")
+        print(f"\n📊 Total return % by fee (columns) and ATR slippage, {engine} engine")
+        print(table.to_string())
+
+        survivors = grid[(grid["fee"] == 0.001) & (grid["slippage"] == 0.1) & (grid["total_return_pct"] > 0)]
+        print(f"✅ Profitable at 0.1% fee + 0.1 ATR slippage: {', '.join(survivors['strategy']) or 'none'}")
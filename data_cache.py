@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = "data"
+CACHE_DIRNAME = ".cache"
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+def _file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _paths(symbol, timeframe, data_dir, cache_dir):
+    source = os.path.join(data_dir, f"{symbol}_{timeframe}.csv")
+    cache_dir = cache_dir or os.path.join(data_dir, CACHE_DIRNAME)
+    return source, os.path.join(cache_dir, f"{symbol}_{timeframe}")
+
+
+def _read_meta(entry_dir):
+    try:
+        with open(os.path.join(entry_dir, "meta.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def atomic_write(path, write, mode="wb"):
+    """
+    Writes through write(file) into a unique temp file next to `path`, then renames it over `path`.
+
+    Pool workers may build the same entry at once; each writes its own
+    temp file, so the last rename wins and no rename loses its source.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _write_meta(entry_dir, meta):
+    atomic_write(os.path.join(entry_dir, "meta.json"), lambda f: json.dump(meta, f, indent=2), mode="w")
+
+
+def build_cache(symbol, timeframe, data_dir=DATA_DIR, cache_dir=None):
+    """
+    Converts one OHLCV CSV into per-column .npy files.
+
+    Timestamps are stored as int64 epoch milliseconds and prices/volume as
+    float64, so later loads are a memory map instead of a CSV parse.
+    """
+    source, entry_dir = _paths(symbol, timeframe, data_dir, cache_dir)
+    os.makedirs(entry_dir, exist_ok=True)
+
+    df = pd.read_csv(source)
+    columns = {"timestamp": pd.to_datetime(df["timestamp"]).to_numpy(dtype="datetime64[ms]").view("int64")}
+    for col in OHLCV_COLUMNS:
+        columns[col] = df[col].to_numpy(dtype="float64")
+
+    for name, values in columns.items():
+        atomic_write(os.path.join(entry_dir, f"{name}.npy"), lambda f: np.save(f, np.ascontiguousarray(values)))
+
+    stat = os.stat(source)
+    _write_meta(entry_dir, {
+        "source": os.path.abspath(source),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": _file_sha256(source),
+        "rows": len(df),
+        "columns": list(columns),
+    })
+    return entry_dir
+
+
+def ensure_cache(symbol, timeframe, data_dir=DATA_DIR, cache_dir=None):
+    """
+    Returns the cache directory for a CSV, rebuilding it if the source changed.
+
+    A matching mtime and size is trusted as-is. Otherwise the file is hashed:
+    an unchanged hash only refreshes the stored mtime, a new hash rebuilds.
+    """
+    source, entry_dir = _paths(symbol, timeframe, data_dir, cache_dir)
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"❌ {source} not found.")
+
+    meta = _read_meta(entry_dir)
+    if meta is None:
+        return build_cache(symbol, timeframe, data_dir, cache_dir)
+
+    stat = os.stat(source)
+    if stat.st_mtime_ns == meta["mtime_ns"] and stat.st_size == meta["size"]:
+        return entry_dir
+
+    if _file_sha256(source) != meta["sha256"]:
+        return build_cache(symbol, timeframe, data_dir, cache_dir)
+
+    meta.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+    _write_meta(entry_dir, meta)
+    return entry_dir
+
+
+def load_arrays(symbol, timeframe, data_dir=DATA_DIR, cache_dir=None):
+    """
+    Loads cached columns as read-only memory maps (zero-copy).
+
+    Returns:
+    - dict with 'timestamp' (int64 epoch ms) and float64 OHLCV arrays
+    """
+    entry_dir = ensure_cache(symbol, timeframe, data_dir, cache_dir)
+    return {
+        name: np.load(os.path.join(entry_dir, f"{name}.npy"), mmap_mode="r")
+        for name in ["timestamp"] + OHLCV_COLUMNS
+    }
+
+
+def frame_from_arrays(columns):
+    """DataFrame over {name: 1-D array} that shares the arrays' memory instead of copying them."""
+    # Wrapping each array in a Series first keeps one block per column (no consolidation copy)
+    return pd.DataFrame({name: pd.Series(values, copy=False) for name, values in columns.items()}, copy=False)
+
+
+def load_ohlcv(symbol, timeframe, data_dir=DATA_DIR, cache_dir=None):
+    """
+    Loads one symbol/timeframe as a DataFrame backed by the cached arrays.
+
+    'timestamp' is a datetime64[ms] view of the int64 epoch milliseconds, so
+    no column is parsed or copied.
+    """
+    arrays = load_arrays(symbol, timeframe, data_dir, cache_dir)
+    arrays["timestamp"] = arrays["timestamp"].view("datetime64[ms]")
+    return frame_from_arrays(arrays)
+
+
+def load_candles(target="LTC", anchors=("BTC", "ETH"), timeframe="1H", data_dir=DATA_DIR):
+    """
+    Loads the target and anchor series in the layout generate_signals expects.
+
+    Returns:
+    - candles_target with plain OHLCV columns
+    - candles_anchor with '<field>_<SYMBOL>' columns merged on timestamp
+    """
+    candles_target = load_ohlcv(target, timeframe, data_dir)
+    candles_anchor = None
+    for symbol in anchors:
+        df = load_ohlcv(symbol, timeframe, data_dir).rename(columns={c: f"{c}_{symbol}" for c in OHLCV_COLUMNS})
+        candles_anchor = df if candles_anchor is None else candles_anchor.merge(df, on="timestamp", how="inner")
+    return candles_target, candles_anchor
@@ -0,0 +1,325 @@
+import contextlib
+import importlib
+import io
+
+import numpy as np
+import pandas as pd
+
+from feature_cache import anchor_momentum, anchor_returns, anchor_scores
+from panel import join_on_timestamp
+from profiling import stage
+from signals import HOLD, SIGNAL_NAMES, signal_frame
+
+
+def _exit_hits(price, atr, entry_price, side, lo, hi, trail_carry, p):
+    """
+    Evaluates the exit rules on bars lo..hi-1 of an open trade.
+
+    Returns the boolean hit mask and the trailing stop carried past hi.
+    Expressions mirror the strategy loops term by term so that every float
+    comparison rounds exactly as it does there.
+    """
+    close = price[lo:hi]
+    change = close / entry_price - 1
+    directed = -change if (side < 0 and p["mirror_short"]) else change
+    hits = np.zeros(hi - lo, dtype=bool)
+
+    if p["take_profit"] is not None:
+        hits |= directed >= p["take_profit"]
+    if p["stop_loss"] is not None:
+        hits |= directed <= -p["stop_loss"]
+    if p["take_profit_pct"] is not None:
+        hits |= change * 100 >= p["take_profit_pct"]
+    if p["atr_take_profit"] is not None:
+        hits |= directed >= p["atr_take_profit"] * atr[lo:hi] / entry_price
+    if p["atr_stop_loss"] is not None:
+        hits |= directed <= -p["atr_stop_loss"] * atr[lo:hi] / entry_price
+
+    if p["initial_stop"] is not None:
+        # Trailing stop = running max of the initial stop and every tier candidate
+        unrealized_pct = change * 100
+        candidate = np.full(hi - lo, -np.inf)
+        for threshold, mult in p["trail_tiers"]:
+            level = close - atr[lo:hi] * mult
+            active = ~np.isnan(level) if threshold is None else (unrealized_pct > threshold) & ~np.isnan(level)
+            candidate = np.where(active, np.maximum(candidate, level), candidate)
+        if p["frozen"] is not None:
+            candidate[p["frozen"][lo:hi]] = -np.inf
+        trail = np.maximum.accumulate(np.concatenate(([trail_carry], candidate)))[1:]
+        hits |= close < trail
+        trail_carry = trail[-1]
+
+    if p["force_exit"] is not None:
+        hits |= p["force_exit"][lo:hi]
+    if p["frozen"] is not None:
+        hits &= ~p["frozen"][lo:hi]
+    return hits, trail_carry
+
+
+def exit_codes(price, long_entry, short_entry=None, *, take_profit=None, stop_loss=None,
+               take_profit_pct=None, atr=None, atr_take_profit=None, atr_stop_loss=None,
+               mirror_short=True, max_hold=None, initial_stop=None, trail_tiers=(),
+               force_exit=None, frozen=None, chunk=64):
+    """
+    Turns entry triggers into int8 signal codes (BUY=1, SELL=-1, HOLD=0)
+    with one position at a time.
+
+    Parameters:
+    - price: close prices
+    - long_entry / short_entry: boolean trigger arrays, checked only while flat
+      (long wins when both fire); the entry bar gets 'BUY' / 'SELL'
+    - take_profit / stop_loss: exit when the (side-directed) change reaches
+      +take_profit or -stop_loss, change = price / entry - 1
+    - take_profit_pct: exit when (price / entry - 1) * 100 >= value (long only)
+    - atr, atr_take_profit / atr_stop_loss: ATR-scaled take-profit / stop-loss
+      multiples, measured against the current bar's ATR
+    - mirror_short: negate the change for shorts (strategy1/2); strategy.py
+      applies the same thresholds to both sides and passes False
+    - max_hold: close on the bar where the holding count reaches max_hold
+    - initial_stop: ATR multiple below the entry price for a trailing stop
+    - trail_tiers: (unrealized_pct threshold or None, ATR multiple) pairs that
+      ratchet the trailing stop up to price - atr * multiple
+    - force_exit: boolean array that closes any open position
+    - frozen: boolean array of bars the loop skips entirely (no entry, exit or
+      trailing update)
+
+    Returns:
+    - int8 array of signal codes (see signals.py)
+
+    The loop over trades is the only Python loop; each trade's exit is found
+    with a segment-wise cumulative max and a first-hit search over chunks of
+    bars that double in size, so the cost is O(bars) overall.
+    """
+    price = np.asarray(price, dtype=float)
+    n = len(price)
+    long_entry = np.asarray(long_entry, dtype=bool)
+    short_entry = np.zeros(n, dtype=bool) if short_entry is None else np.asarray(short_entry, dtype=bool)
+    atr = None if atr is None else np.asarray(atr, dtype=float)
+    p = {
+        "take_profit": take_profit, "stop_loss": stop_loss, "take_profit_pct": take_profit_pct,
+        "atr_take_profit": atr_take_profit, "atr_stop_loss": atr_stop_loss, "mirror_short": mirror_short,
+        "initial_stop": initial_stop, "trail_tiers": trail_tiers,
+        "force_exit": None if force_exit is None else np.asarray(force_exit, dtype=bool),
+        "frozen": None if frozen is None else np.asarray(frozen, dtype=bool),
+    }
+
+    can_enter = long_entry | short_entry
+    if p["frozen"] is not None:
+        can_enter &= ~p["frozen"]
+    candidates = np.flatnonzero(can_enter)
+    codes = np.zeros(n, dtype=np.int8)
+
+    pos = 0
+    while True:
+        k = np.searchsorted(candidates, pos)
+        if k == len(candidates):
+            break
+        i = candidates[k]
+        side = 1 if long_entry[i] else -1
+        codes[i] = side
+
+        entry_price = price[i]
+        trail_carry = entry_price - atr[i] * initial_stop if initial_stop is not None else np.nan
+        last = n - 1 if max_hold is None else min(n - 1, i + max(max_hold - 1, 1))
+
+        exit_bar = None
+        lo, size = i + 1, chunk
+        while lo <= last:
+            hi = min(last + 1, lo + size)
+            hits, trail_carry = _exit_hits(price, atr, entry_price, side, lo, hi, trail_carry, p)
+            if hits.any():
+                exit_bar = lo + int(np.argmax(hits))
+                break
+            lo, size = hi, size * 2
+
+        if exit_bar is None and max_hold is not None and last == i + max(max_hold - 1, 1):
+            exit_bar = last
+        if exit_bar is None:
+            break
+        codes[exit_bar] = -side
+        pos = exit_bar + 1
+
+    return codes
+
+
+def exit_signals(price, long_entry, short_entry=None, **rules):
+    """exit_codes() as an object array of 'BUY' / 'SELL' / 'HOLD'."""
+    return SIGNAL_NAMES[exit_codes(price, long_entry, short_entry, **rules) + 1]
+
+
+# ---------------------------------------------------------------------------
+# Strategy adapters: each strategy's entry triggers feeding the kernel
+# ---------------------------------------------------------------------------
+
+def _py_max(a, b):
+    # Python's max(a, b) keeps a unless b > a, so a NaN in either slot behaves as in the loops
+    return np.where(b > a, b, a)
+
+
+def lagged_anchor_signals(candles_target, candles_anchor, filtered=False, anchor_move=0.01, lag_band=0.002,
+                          take_profit=0.05, stop_loss=0.03, max_hold=6):
+    """strategy1.py (filtered=False) and strategy2.py (filtered=True)."""
+    with stage("kernel.features"):
+        candles_target = candles_target.rename(columns={"close": "close_LTC"})
+        df = join_on_timestamp(candles_target[["timestamp", "close_LTC", "high", "low"]], candles_anchor)
+
+        # Anchor returns only depend on the anchor closes, so grid points share one cached copy
+        returns = anchor_returns(df[["close_BTC", "close_ETH"]], periods=1)
+        ret_btc, ret_eth = returns["ret_btc"].shift(1), returns["ret_eth"].shift(1)
+        ret_ltc = df["close_LTC"].pct_change().shift(1)
+        lagged_pump = ((ret_btc > anchor_move) | (ret_eth > anchor_move)) & (ret_ltc < lag_band)
+        lagged_dump = ((ret_btc < -anchor_move) | (ret_eth < -anchor_move)) & (ret_ltc > -lag_band)
+
+        if filtered:
+            vol_avg = ((df["high"] - df["low"]) / df["close_LTC"].shift(1)).rolling(6).mean().shift(1)
+            ltc_trend = df["close_LTC"].pct_change().rolling(4).mean().shift(1)
+            allowed = ~((vol_avg > 0.03) | (ltc_trend.abs() < 0.002))
+            lagged_pump &= allowed
+            lagged_dump &= allowed
+
+    with stage("kernel.exits"):
+        codes = exit_codes(df["close_LTC"], lagged_pump, lagged_dump, take_profit=take_profit,
+                           stop_loss=stop_loss, max_hold=max_hold)
+        return signal_frame(df["timestamp"], codes)
+
+
+def anchor_score_signals(candles_target, candles_anchor, tp_mult=2.5, sl_mult=1.2, max_hold=18, lookback=2):
+    """strategy.py, including its position_size column."""
+    with stage("kernel.features"):
+        df = candles_target.copy()
+        df["atr"] = (df["high"] - df["low"]).rolling(14).mean()
+        df["ltc_return"] = df["close"].pct_change(3)
+        df["ltc_vol"] = df["close"].rolling(14).std()
+        vol_threshold = df["ltc_vol"].quantile(0.85)
+
+        # The cache key ignores the index, so re-label a hit with this frame's index
+        scores = anchor_scores(candles_anchor[["close_BTC", "close_ETH"]], lookback=lookback)
+        scores.index = candles_anchor.index
+        df = join_on_timestamp(df, pd.concat([candles_anchor[["timestamp"]], scores], axis=1))
+
+        score_btc, score_eth = df["score_BTC"].to_numpy(), df["score_ETH"].to_numpy()
+        calm_lagging = (df["ltc_vol"] <= vol_threshold).to_numpy() & (
+            np.abs(df["ltc_return"].to_numpy()) < _py_max(df["ret_BTC"].to_numpy(), df["ret_ETH"].to_numpy()))
+        buy = ((score_btc > 0.002) | (score_eth > 0.002)) & calm_lagging
+        sell = ((score_btc < -0.002) | (score_eth < -0.002)) & calm_lagging
+
+    with stage("kernel.exits"):
+        codes = exit_codes(df["close"], buy, sell, atr=df["atr"], atr_take_profit=tp_mult,
+                           atr_stop_loss=sl_mult, mirror_short=False, max_hold=max_hold)
+
+    # Entries are the BUY/SELL bars that open a trade: every other non-HOLD signal
+    trades = np.flatnonzero(codes != HOLD)[::2]
+    score_mag = _py_max(np.abs(score_btc), np.abs(score_eth))
+    position_size = np.ones(len(df))
+    position_size[trades] = np.minimum(1.0, _py_max(0.25, score_mag[trades] / 0.01))
+    return signal_frame(df["timestamp"], codes, position_size=position_size)
+
+
+def _momentum_frame(candles_target, candles_anchor):
+    ltc_cols = {"open": "open_LTC", "high": "high_LTC", "low": "low_LTC", "close": "close_LTC",
+                "volume": "volume_LTC"}
+    df = join_on_timestamp(candles_target.rename(columns=ltc_cols), candles_anchor)
+    df["atr"] = (df["high_LTC"] - df["low_LTC"]).rolling(14).mean()
+    df["volatility_ratio"] = (df["atr"] / df["close_LTC"].shift(1)).clip(0.005, 0.04)
+    df["price_break"] = df["close_LTC"] > df["high_LTC"].shift(1)
+    return df
+
+
+def _after(n, start):
+    mask = np.zeros(n, dtype=bool)
+    mask[start:] = True
+    return mask
+
+
+def breakout_signals(candles_target, candles_anchor):
+    """strategy3.py."""
+    with stage("kernel.features"):
+        df = _momentum_frame(candles_target, candles_anchor)
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        df = df[(df["timestamp"] >= "2025-01-01") & (df["timestamp"] <= "2025-05-09")].copy()
+
+        entry = ((df["close_BTC"].pct_change(4) > 0.005) & (df["close_ETH"].pct_change(4) > 0.004)
+                 & df["price_break"] & (df["atr"] < 0.02 * df["close_LTC"])).to_numpy() & _after(len(df), 4)
+    with stage("kernel.exits"):
+        codes = exit_codes(df["close_LTC"], entry, atr=df["atr"], initial_stop=2, trail_tiers=((None, 1.5),),
+                           take_profit=1.04 - 1)
+        return signal_frame(df["timestamp"], codes)
+
+
+def adaptive_momentum_signals(candles_target, candles_anchor):
+    """strategy4.py."""
+    with stage("kernel.features"):
+        df = _momentum_frame(candles_target, candles_anchor)
+        volume = df["volume_LTC"]
+        volume_z = (volume - volume.rolling(50).mean()) / volume.rolling(50).std()
+        frozen = (df["close_LTC"] < df["close_LTC"].rolling(200).mean()).to_numpy()
+
+        entry = ((df["close_BTC"].pct_change(4) > 0.005) & (df["close_ETH"].pct_change(4) > 0.004)
+                 & df["price_break"] & (df["volatility_ratio"] < 0.02) & (volume_z > 0.5)).to_numpy()
+    with stage("kernel.exits"):
+        codes = exit_codes(df["close_LTC"], entry & _after(len(df), 2), atr=df["atr"], initial_stop=1.5,
+                           trail_tiers=((None, 1.2),), take_profit_pct=3.0,
+                           force_exit=(df["volatility_ratio"] > 0.03).to_numpy(),
+                           frozen=frozen & _after(len(df), 2))
+        return signal_frame(df["timestamp"], codes)
+
+
+def multi_timeframe_signals(candles_target, candles_anchor, volatility="atr_ratio", mom_4h=(0.006, 0.005),
+                            mom_1d=0.01, volume_mult=1.3, initial_stop=2, tiers=((2, 1.8), (4, 1.5)),
+                            target_pct=6, vol_ok=0.025, vol_exit=0.035):
+    """strategy5.py with the defaults; strategy6.py via VECTORIZED['strategy6']."""
+    with stage("kernel.features"):
+        df = _momentum_frame(candles_target, candles_anchor)
+        if volatility == "atr_ratio":
+            current_vol = df["volatility_ratio"]
+        else:
+            current_vol = df["close_LTC"].pct_change().rolling(24).std()
+
+        closes = df[["close_BTC", "close_ETH"]]
+        mom_short = anchor_momentum(closes, periods=4, window=8)
+        mom_long = anchor_momentum(closes, periods=24, window=24)
+        mom = {coin: (mom_short[f"{coin}_mom_4_8"], mom_long[f"{coin}_mom_24_24"]) for coin in ["BTC", "ETH"]}
+        volume_spike = df["volume_LTC"] > df["volume_LTC"].rolling(50).mean() * volume_mult
+
+        entry = ((mom["BTC"][0] > mom_4h[0]) & (mom["ETH"][0] > mom_4h[1]) & (mom["BTC"][1] > mom_1d)
+                 & df["price_break"] & (current_vol < vol_ok) & volume_spike).to_numpy()
+    with stage("kernel.exits"):
+        codes = exit_codes(df["close_LTC"], entry & _after(len(df), 4), atr=df["atr"],
+                           initial_stop=initial_stop, trail_tiers=tiers, take_profit_pct=target_pct,
+                           force_exit=(current_vol > vol_exit).to_numpy())
+        return signal_frame(df["timestamp"], codes)
+
+
+VECTORIZED = {
+    "strategy": anchor_score_signals,
+    "strategy1": lagged_anchor_signals,
+    "strategy2": lambda t, a, **kw: lagged_anchor_signals(t, a, filtered=True, **kw),
+    "strategy3": breakout_signals,
+    "strategy4": adaptive_momentum_signals,
+    "strategy5": multi_timeframe_signals,
+    "strategy6": lambda t, a: multi_timeframe_signals(
+        t, a, volatility="ret_std", mom_4h=(0.008, 0.006), mom_1d=0.015, volume_mult=1.5,
+        initial_stop=1.8, tiers=((3, 1.5), (6, 1.2)), target_pct=8),
+}
+
+
+def check_equivalence(strategy_name, candles_target, candles_anchor, **params):
+    """Returns True when the kernel adapter reproduces generate_signals exactly."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = importlib.import_module(strategy_name).generate_signals(candles_target, candles_anchor, **params)
+    actual = VECTORIZED[strategy_name](candles_target, candles_anchor, **params)
+
+    same = (len(expected) == len(actual)
+            and (expected["signal"].to_numpy() == actual["signal"].to_numpy()).all()
+            and all((expected[c].to_numpy() == actual[c].to_numpy()).all() for c in expected.columns
+                    if c not in ("signal", "timestamp")))
+    print(f"{'✅' if same else '❌'} {strategy_name}: exit kernel {'matches' if same else 'differs from'} generate_signals")
+    return same
+
+
+if __name__ == "__main__":
+    from data_cache import load_candles
+
+    candles_target, candles_anchor = load_candles()
+    for name in VECTORIZED:
+        check_equivalence(name, candles_target, candles_anchor)
@@ -0,0 +1,180 @@
+import functools
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from data_cache import atomic_write
+
+
+def data_hash(data):
+    """
+    Content hash of a DataFrame, Series or array (column names, dtypes and values).
+
+    Two frames with equal contents hash equally even if they are different
+    objects, which is what happens when a strategy receives candles_anchor.copy().
+    """
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(data, pd.Series):
+        data = data.to_frame()
+    if isinstance(data, pd.DataFrame):
+        for name in data.columns:
+            values = data[name].to_numpy()
+            h.update(f"{name}:{values.dtype}".encode())
+            if values.dtype == object:
+                values = pd.util.hash_array(values)
+            h.update(np.ascontiguousarray(values).view(np.uint8))
+    else:
+        values = np.ascontiguousarray(data)
+        h.update(f"{values.dtype}{values.shape}".encode())
+        h.update(values.view(np.uint8))
+    return h.hexdigest()
+
+
+def _copy(value):
+    return value.copy() if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)) else value
+
+
+class FeatureCache:
+    """
+    Content-addressed cache for derived feature columns.
+
+    Entries are keyed by (data hash, feature name, parameters). A bounded LRU
+    holds recent results in memory; with `disk_dir` set, results are also
+    pickled there and survive across processes and sessions. Values are
+    copied in and out so callers may mutate what they get back.
+    """
+
+    def __init__(self, maxsize=256, disk_dir=None):
+        self.maxsize = maxsize
+        self.disk_dir = disk_dir
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def key(digest, name, params):
+        return hashlib.blake2b(f"{digest}|{name}|{sorted(params.items())!r}".encode(), digest_size=16).hexdigest()
+
+    def get_or_compute(self, data, name, compute, **params):
+        """Returns compute(data, **params), reusing a cached result for identical inputs."""
+        key = self.key(data_hash(data), name, params)
+
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return _copy(self.entries[key])
+
+        path = os.path.join(self.disk_dir, f"{key}.pkl") if self.disk_dir else None
+        value = self._load(path) if path else None
+        if value is not None:
+            self.disk_hits += 1
+        else:
+            value = compute(_copy(data), **params)
+            self.misses += 1
+            if path:
+                # Workers sharing disk_dir may compute the same key at once; each writes its own temp file
+                atomic_write(path, lambda f: pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL))
+
+        self.entries[key] = value
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return _copy(value)
+
+    @staticmethod
+    def _load(path):
+        """Pickled value at path, or None when it is missing or unreadable (treated as a miss)."""
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            # Missing, or truncated/corrupt (e.g. left by an interrupted writer): recompute and replace it
+            return None
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+        }
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.disk_hits = self.misses = 0
+
+
+FEATURE_CACHE = FeatureCache()
+
+
+def cached(name=None, cache=None):
+    """
+    Decorator for feature functions of the form fn(data, **params).
+
+    Parameters must be passed by keyword so they become part of the key.
+    """
+    def decorate(fn):
+        feature = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(data, **params):
+            return (cache or FEATURE_CACHE).get_or_compute(data, feature, fn, **params)
+
+        wrapper.uncached = fn
+        return wrapper
+
+    return decorate
+
+
+@cached("anchor_returns")
+def anchor_returns(candles_anchor, coins=("BTC", "ETH"), periods=1):
+    """ret_<coin> = close_<coin>.pct_change(periods), as in strategy1/2."""
+    return pd.DataFrame({f"ret_{c.lower()}": candles_anchor[f"close_{c}"].pct_change(periods) for c in coins})
+
+
+@cached("anchor_momentum")
+def anchor_momentum(candles_anchor, coins=("BTC", "ETH"), periods=4, window=8):
+    """close_<coin>.pct_change(periods).rolling(window).mean(), as in strategy5/6."""
+    return pd.DataFrame({
+        f"{c}_mom_{periods}_{window}": candles_anchor[f"close_{c}"].pct_change(periods).rolling(window).mean()
+        for c in coins
+    })
+
+
+@cached("anchor_scores")
+def anchor_scores(candles_anchor, coins=("BTC", "ETH"), lookback=2, window=14):
+    """ret_<COIN> = pct_change(lookback) and score_<COIN> = ret / rolling(window).std(), as in strategy.py."""
+    columns = {}
+    for c in coins:
+        close = candles_anchor[f"close_{c}"]
+        columns[f"ret_{c}"] = close.pct_change(lookback)
+        columns[f"score_{c}"] = columns[f"ret_{c}"] / close.rolling(window).std()
+    return pd.DataFrame(columns)
+
+
+def install(strategy_module, cache=None):
+    """
+    Routes a strategy module's compute_anchor_scores through the cache.
+
+    generate_signals looks the helper up as a module global, so replacing the
+    attribute is enough; the strategy file itself stays unchanged and
+    submission-safe. Returns True if the module had a helper to wrap.
+    """
+    fn = getattr(strategy_module, "compute_anchor_scores", None)
+    if fn is None or hasattr(fn, "uncached"):
+        return False
+
+    name = f"{strategy_module.__name__}.compute_anchor_scores"
+
+    def compute_anchor_scores(df_anchor, lookback=2):
+        return (cache or FEATURE_CACHE).get_or_compute(df_anchor, name, fn, lookback=lookback)
+
+    compute_anchor_scores.uncached = fn
+    strategy_module.compute_anchor_scores = compute_anchor_scores
+    return True
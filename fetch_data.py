@@ -1,13 +1,89 @@
 import requests
 import pandas as pd
+import math
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 BINANCE_API_URL = "https://api.binance.com/api/v3/klines"
 
-def fetch_ohlcv(symbol, interval, start_time_ms, end_time_ms):
+# Binance allows 6000 request weight per minute per IP; a klines call costs 2
+REQUEST_WEIGHT_PER_MINUTE = 6000
+KLINES_WEIGHT = 2
+KLINES_LIMIT = 1000
+RETRY_STATUS = {418, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by every download thread.
+
+    Holds up to `capacity` weight and refills at `refill_per_sec`; acquire()
+    blocks until the requested weight is available.
+    """
+
+    @classmethod
+    def per_minute(cls, weight_per_minute=REQUEST_WEIGHT_PER_MINUTE, burst_fraction=0.1):
+        # Any 60s window can spend the burst plus one minute of refill, so the
+        # refill rate leaves room for the burst to stay within the budget
+        capacity = weight_per_minute * burst_fraction
+        return cls(capacity, (weight_per_minute - capacity) / 60)
+
+    def __init__(self, capacity=REQUEST_WEIGHT_PER_MINUTE, refill_per_sec=REQUEST_WEIGHT_PER_MINUTE / 60):
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, weight=1):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_sec)
+                self.updated = now
+                if self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+                wait = (weight - self.tokens) / self.refill_per_sec
+            time.sleep(wait)
+
+
+def make_session(pool_size=10):
+    """Creates a requests Session with a connection pool sized for the thread pool."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _get_klines_page(session, limiter, url, params, max_retries=5, backoff=0.5):
+    for attempt in range(max_retries + 1):
+        limiter.acquire(KLINES_WEIGHT)
+        response = session.get(url, params=params, timeout=30)
+        if response.status_code == 200:
+            return response.json()
+
+        if response.status_code not in RETRY_STATUS or attempt == max_retries:
+            raise Exception(f"Failed to fetch data: {response.status_code}, {response.text}")
+
+        # Honour Retry-After on 418/429, otherwise back off exponentially
+        retry_after = response.headers.get("Retry-After")
+        delay = float(retry_after) if retry_after else backoff * (2 ** attempt)
+        print(f"⚠️ {params['symbol']} got {response.status_code}, retrying in {delay:.1f}s")
+        time.sleep(delay)
+
+
+def fetch_ohlcv(symbol, interval, start_time_ms, end_time_ms, session=None, limiter=None,
+                base_url=BINANCE_API_URL, allow_empty=False):
     all_candles = []
-    limit = 1000
+    limit = KLINES_LIMIT
     current_time = start_time_ms
+    session = session or make_session(1)
+    limiter = limiter or TokenBucket.per_minute()
 
     print(f"\n📥 Starting download for {symbol} ({interval})...")
 
@@ -20,11 +96,7 @@ def fetch_ohlcv(symbol, interval, start_time_ms, end_time_ms):
             "limit": limit
         }
 
-        response = requests.get(BINANCE_API_URL, params=params)
-        if response.status_code != 200:
-            raise Exception(f"Failed to fetch data: {response.status_code}, {response.text}")
-
-        data = response.json()
+        data = _get_klines_page(session, limiter, base_url, params)
         if not data:
             print("No more data returned.")
             break
@@ -33,12 +105,14 @@ def fetch_ohlcv(symbol, interval, start_time_ms, end_time_ms):
 
         start_ts = pd.to_datetime(data[0][0], unit="ms")
         end_ts = pd.to_datetime(data[-1][0], unit="ms")
-        print(f"Fetched {len(data)} rows: {start_ts} to {end_ts}")
+        print(f"{symbol} ({interval}): fetched {len(data)} rows: {start_ts} to {end_ts}")
 
+        # A short page means the exchange has nothing further in the window
+        if len(data) < limit:
+            break
         current_time = data[-1][0] + 1
-        time.sleep(0.2)
 
-    if not all_candles:
+    if not all_candles and not allow_empty:
         raise Exception(f"No data returned for {symbol} from {start_time_ms} to {end_time_ms}")
 
     # Convert to DataFrame
@@ -55,30 +129,118 @@ def fetch_ohlcv(symbol, interval, start_time_ms, end_time_ms):
     return df
 
 
-def fetch_all(symbols_with_timeframes, start_time, end_time):
+def store_path(store_dir, symbol, interval):
+    """Path of the stored CSV for a pair, e.g. ('data', 'LTCUSDT', '4h') -> data/LTC_4H.csv."""
+    base = symbol.upper()
+    if base.endswith("USDT"):
+        base = base[:-4]
+    return os.path.join(store_dir, f"{base}_{interval.upper()}.csv")
+
+
+def last_stored_timestamp(path):
+    """Returns the open time (ms) of the last candle in a stored CSV, or None."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 4096))
+        lines = [line for line in f.read().splitlines() if line.strip()]
+    if not lines or lines[-1].startswith(b"timestamp"):
+        return None
+    return int(pd.Timestamp(lines[-1].split(b",")[0].decode()).timestamp() * 1000)
+
+
+def fetch_incremental(symbol, interval, start_time_ms, end_time_ms, path, session=None, limiter=None,
+                      base_url=BINANCE_API_URL):
+    """
+    Downloads only candles after the last one stored at `path` and merges them in.
+    end_time_ms is exclusive: nothing opening at or after it is stored.
+
+    The last stored candle is requested again because it may have been
+    written while still open; rows are deduplicated on open time (newest
+    wins) and the file is replaced atomically.
+
+    Returns:
+    - DataFrame of stored + new candles from start_time_ms onwards
+    - Number of pages a full download would have needed but were skipped
+    """
+    last_ms = last_stored_timestamp(path)
+    resume_ms = start_time_ms if last_ms is None else max(start_time_ms, last_ms)
+
+    # The klines endTime bound is inclusive, so stop one ms short of the exclusive end
+    new = fetch_ohlcv(symbol, interval, resume_ms, end_time_ms - 1, session=session, limiter=limiter,
+                      base_url=base_url, allow_empty=True)
+
+    if last_ms is None:
+        stored = new.iloc[:0]
+    else:
+        stored = pd.read_csv(path, parse_dates=["timestamp"])
+        stored["timestamp"] = stored["timestamp"].astype(new["timestamp"].dtype)
+
+    stored_ms = stored["timestamp"].to_numpy(dtype="datetime64[ms]").view("int64")
+    skipped = math.ceil(((stored_ms >= start_time_ms) & (stored_ms < resume_ms)).sum() / KLINES_LIMIT)
+
+    df = pd.concat([stored, new], ignore_index=True)
+    df = df.drop_duplicates("timestamp", keep="last").sort_values("timestamp")
+    # Never store candles at or past the end of the window
+    df = df[df["timestamp"] < pd.to_datetime(end_time_ms, unit="ms")].reset_index(drop=True)
+
+    tmp = f"{path}.tmp"
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+    df = df[df["timestamp"] >= pd.to_datetime(start_time_ms, unit="ms")].reset_index(drop=True)
+    return df, skipped
+
+
+def fetch_all(symbols_with_timeframes, start_time, end_time, max_workers=4,
+              weight_per_minute=REQUEST_WEIGHT_PER_MINUTE, base_url=BINANCE_API_URL, store_dir=None):
+    """
+    Downloads every symbol/timeframe concurrently.
+
+    All threads share one pooled HTTP session and one token bucket sized to
+    the exchange request-weight budget, so concurrency never exceeds it.
+    With `store_dir`, each series resumes from its stored CSV there (see
+    fetch_incremental) and the number of skipped pages is reported in
+    each DataFrame's attrs["pages_skipped"].
+    """
     start_ms = int(pd.Timestamp(start_time).timestamp() * 1000)
     end_ms = int(pd.Timestamp(end_time).timestamp() * 1000)
-    all_data = {}
-
-    for name, (symbol, tf) in symbols_with_timeframes.items():
-        df = fetch_ohlcv(symbol, tf, start_ms, end_ms)
+    limiter = TokenBucket.per_minute(weight_per_minute)
+    session = make_session(max_workers)
+
+    def fetch_one(item):
+        name, (symbol, tf) = item
+        if store_dir:
+            df, skipped = fetch_incremental(symbol, tf, start_ms, end_ms, store_path(store_dir, symbol, tf),
+                                            session=session, limiter=limiter, base_url=base_url)
+        else:
+            df = fetch_ohlcv(symbol, tf, start_ms, end_ms, session=session, limiter=limiter, base_url=base_url)
+            skipped = 0
 
         # Clip exactly to end_time for strict compliance
         df = df[df["timestamp"] < pd.to_datetime(end_time)]
+        df.attrs["pages_skipped"] = skipped
+        print(f"✅ Finished: {symbol} → {len(df)} rows retained (before {end_time}), {skipped} pages skipped\n")
+        return name, df
 
-        all_data[name] = df
-        print(f"✅ Finished: {symbol} → {len(df)} rows retained (before {end_time})\n")
+    with session, ThreadPoolExecutor(max_workers=max_workers) as pool:
+        all_data = dict(pool.map(fetch_one, symbols_with_timeframes.items()))
+
+    if store_dir:
+        total = sum(df.attrs["pages_skipped"] for df in all_data.values())
+        print(f"⏭️ Skipped {total} pages already in {store_dir}")
 
     return all_data
 
 
 if __name__ == "__main__":
-    # Define symbols and timeframes
+    # Define symbols and timeframes (4H/1D are built locally from 1H, see resample.py)
     symbols_with_timeframes = {
-    "target_ltc": ("LTCUSDT", "4h"),
-    "anchor_btc": ("BTCUSDT", "4h"),
-    "anchor_eth": ("ETHUSDT", "4h"),
-    "anchor_sol": ("SOLUSDT", "4h"),
+    "target_ltc": ("LTCUSDT", "1h"),
+    "anchor_btc": ("BTCUSDT", "1h"),
+    "anchor_eth": ("ETHUSDT", "1h"),
+    "anchor_sol": ("SOLUSDT", "1h"),
     }
 
 
@@ -86,11 +248,6 @@ if __name__ == "__main__":
     START_DATE = "2025-01-01 00:00:00"
     END_DATE = "2025-05-09 00:00:00"  # do not exceed
 
-    # Fetch and save
-    data = fetch_all(symbols_with_timeframes, START_DATE, END_DATE)
-
-    data['target_ltc'].to_csv("LTC_4H.csv", index=False)
-    data['anchor_btc'].to_csv("BTC_4H.csv", index=False)
-    data['anchor_eth'].to_csv("ETH_4H.csv", index=False)
-    data['anchor_sol'].to_csv("SOL_4H.csv", index=False)
+    # Fetch only candles newer than those already stored in data/
+    data = fetch_all(symbols_with_timeframes, START_DATE, END_DATE, store_dir="data")
     print("Data saved")
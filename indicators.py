@@ -0,0 +1,295 @@
+import math
+
+import numpy as np
+
+NAN = float("nan")
+
+
+# ---------------------------------------------------------------------------
+# Batch mode: NumPy arrays in, NumPy arrays out (same NaN rules as pandas)
+# ---------------------------------------------------------------------------
+
+def _rolling_moments(x, n):
+    """
+    Rolling window count of valid values, mean and sum of squared deviations.
+
+    The series is cut into blocks of n bars and every block is summed around
+    its own mean, so each window (the head of one block plus the tail of the
+    previous one) is measured against a reference at most 2n bars away and
+    short windows keep their precision. Windows of n equal values return that
+    value and zero deviation exactly.
+    """
+    x = np.asarray(x, dtype=float)
+    size = len(x)
+    mean = np.full(size, np.nan)
+    m2 = np.full(size, np.nan)
+    if n < 1 or size < n:
+        return mean, m2
+
+    blocks = -(-size // n)
+    xb = np.r_[x, np.full(blocks * n - size, np.nan)].reshape(blocks, n)
+    missing = np.isnan(xb)
+    count = (~missing).sum(axis=1)
+    ref = np.where(missing, 0.0, xb).sum(axis=1) / np.maximum(count, 1)
+    d = np.where(missing, 0.0, xb - ref[:, None])
+    p1, p2 = np.cumsum(d, axis=1), np.cumsum(d * d, axis=1)
+
+    # Window ending at bar i >= n - 1: its own block up to i, plus the part of the previous
+    # block after i - n, re-centred from that block's reference onto this one
+    head1, head2 = p1.ravel()[n - 1:size], p2.ravel()[n - 1:size]
+    tail1 = np.repeat(p1[:, -1], n)[:size - n + 1] - np.r_[0.0, p1.ravel()[:size - n]]
+    tail2 = np.repeat(p2[:, -1], n)[:size - n + 1] - np.r_[0.0, p2.ravel()[:size - n]]
+    ref_bar = np.repeat(ref, n)[n - 1:size]
+    step = np.repeat(ref, n)[:size - n + 1] - ref_bar
+    k = (n - 1 - np.arange(n - 1, size) % n).astype(float)
+    # Windows that end on a block's last bar lie entirely inside that block
+    own = k == 0
+    tail1[own] = tail2[own] = step[own] = 0.0
+    s1 = head1 + tail1 + k * step
+    s2 = head2 + tail2 + 2 * step * tail1 + k * step * step
+
+    i = np.arange(size)
+    gaps = np.concatenate(([0], np.cumsum(np.isnan(x))))
+    valid = gaps[n:] - gaps[:size - n + 1] == 0
+    mean[n - 1:] = np.where(valid, ref_bar + s1 / n, np.nan)
+    m2[n - 1:] = np.where(valid, np.maximum(s2 - s1 * s1 / n, 0.0), np.nan)
+
+    # Length of the run of equal values ending at each bar (NaN breaks runs)
+    breaks = np.r_[True, x[1:] != x[:-1]]
+    flat = i - np.maximum.accumulate(np.where(breaks, i, 0)) + 1 >= n
+    mean[flat] = x[flat]
+    m2[flat] = 0.0
+    return mean, m2
+
+
+def rolling_mean(x, n):
+    """Equivalent of pd.Series(x).rolling(n).mean()."""
+    return _rolling_moments(x, n)[0]
+
+
+def rolling_std(x, n, ddof=1):
+    """Equivalent of pd.Series(x).rolling(n).std(ddof)."""
+    return np.sqrt(_rolling_moments(x, n)[1] / (n - ddof))
+
+
+def zscore(x, n):
+    """(x - rolling mean) / rolling std over the last n values, current value included."""
+    x = np.asarray(x, dtype=float)
+    mean, m2 = _rolling_moments(x, n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (x - mean) / np.sqrt(m2 / (n - 1))
+
+
+def atr(high, low, n=14):
+    """Mean high-low range over n bars, as the strategies define ATR."""
+    return rolling_mean(np.asarray(high, dtype=float) - np.asarray(low, dtype=float), n)
+
+
+def shift(x, k=1):
+    """Equivalent of pd.Series(x).shift(k) for k >= 0."""
+    x = np.asarray(x, dtype=float)
+    out = np.full(len(x), np.nan)
+    if k < len(x):
+        out[k:] = x[:len(x) - k]
+    return out
+
+
+def pct_change(x, k=1):
+    """Equivalent of pd.Series(x).pct_change(k) for k >= 1."""
+    x = np.asarray(x, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return x / shift(x, k) - 1
+
+
+# ---------------------------------------------------------------------------
+# Streaming mode: O(1) per update, same values as the batch functions
+# ---------------------------------------------------------------------------
+
+class RingBuffer:
+    """
+    Fixed-size circular buffer keeping a running sum and sum of squares.
+
+    Sums are kept relative to a reference value and recomputed from the
+    buffer every time it wraps, so rounding error never accumulates over a
+    long stream (the recompute is O(n) once per n updates).
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.buf = np.full(n, np.nan)
+        self.head = 0
+        self.count = 0
+        self.nans = 0
+        self.ref = 0.0
+        self.sum = 0.0
+        self.sumsq = 0.0
+
+    def push(self, x):
+        """Adds x and returns the value it displaced (x from n updates ago, NaN until full)."""
+        old = self.buf[self.head]
+        if self.count == self.n:
+            if math.isnan(old):
+                self.nans -= 1
+            else:
+                d = old - self.ref
+                self.sum -= d
+                self.sumsq -= d * d
+        else:
+            self.count += 1
+
+        self.buf[self.head] = x
+        if math.isnan(x):
+            self.nans += 1
+        else:
+            d = x - self.ref
+            self.sum += d
+            self.sumsq += d * d
+
+        self.head = (self.head + 1) % self.n
+        if self.head == 0:
+            self._resync()
+        return float(old)
+
+    def _resync(self):
+        values = self.buf[~np.isnan(self.buf)]
+        self.ref = float(values.mean()) if len(values) else 0.0
+        d = values - self.ref
+        self.sum = float(d.sum())
+        self.sumsq = float((d * d).sum())
+
+    @property
+    def full(self):
+        return self.count == self.n and self.nans == 0
+
+    def mean(self):
+        return self.ref + self.sum / self.n if self.full else NAN
+
+    def var(self, ddof=1):
+        if not self.full:
+            return NAN
+        return max(self.sumsq - self.sum * self.sum / self.n, 0.0) / (self.n - ddof)
+
+
+class RollingMean:
+    """Streaming rolling(n).mean(); update(x) returns the mean including x."""
+
+    def __init__(self, n):
+        self.window = RingBuffer(n)
+
+    @property
+    def value(self):
+        return self.window.mean()
+
+    def update(self, x):
+        self.window.push(x)
+        return self.value
+
+
+class RollingStd:
+    """Streaming rolling(n).std(ddof)."""
+
+    def __init__(self, n, ddof=1):
+        self.window = RingBuffer(n)
+        self.ddof = ddof
+
+    @property
+    def value(self):
+        return math.sqrt(self.window.var(self.ddof)) if self.window.full else NAN
+
+    def update(self, x):
+        self.window.push(x)
+        return self.value
+
+
+class ZScore:
+    """Streaming (x - rolling mean) / rolling std over n values, x included."""
+
+    def __init__(self, n):
+        self.window = RingBuffer(n)
+        self.last = NAN
+
+    @property
+    def value(self):
+        if not self.window.full:
+            return NAN
+        std = math.sqrt(self.window.var())
+        diff = self.last - self.window.mean()
+        if std == 0:
+            return NAN if diff == 0 else math.copysign(math.inf, diff)
+        return diff / std
+
+    def update(self, x):
+        self.last = x
+        self.window.push(x)
+        return self.value
+
+
+class ATR(RollingMean):
+    """Streaming mean high-low range over n bars."""
+
+    def __init__(self, n=14):
+        super().__init__(n)
+
+    def update(self, high, low):
+        return super().update(high - low)
+
+
+class PctChange:
+    """Streaming pct_change(k); update(x) returns x / x[k bars ago] - 1."""
+
+    def __init__(self, k=1):
+        self.window = RingBuffer(k)
+        self.value = NAN
+
+    def update(self, x):
+        old = self.window.push(x)
+        if old == 0:
+            self.value = NAN if x == 0 or math.isnan(x) else math.copysign(math.inf, x)
+        else:
+            self.value = x / old - 1
+        return self.value
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    from data_cache import load_arrays
+
+    # Windows the strategies use, on the kinds of series they apply them to. pandas' own
+    # running variance is only good to ~2e-8 relative on 4-bar windows of close prices (and
+    # ~1e-5 on 2-3 bars, which are not compared), hence the looser tolerance for std.
+    windows = (4, 6, 8, 14, 24, 50, 200)
+    ok = True
+    for symbol in ("LTC", "BTC", "ETH", "SOL"):
+        arrays = load_arrays(symbol, "1H")
+        close = np.asarray(arrays["close"])
+        series = {
+            "close": close,
+            "volume": np.asarray(arrays["volume"]),
+            "range": np.asarray(arrays["high"]) - np.asarray(arrays["low"]),
+            "returns": pct_change(close),
+        }
+        for name, x in series.items():
+            scale = np.nanmean(np.abs(x))
+            for n in windows:
+                rolling = pd.Series(x).rolling(n)
+                for stat, got, expected, rtol in (
+                        ("mean", rolling_mean(x, n), rolling.mean().to_numpy(), 1e-9),
+                        ("std", rolling_std(x, n), rolling.std().to_numpy(), 1e-7)):
+                    same = np.array_equal(np.isnan(got), np.isnan(expected)) and np.allclose(
+                        got, expected, rtol=rtol, atol=1e-12 * scale, equal_nan=True)
+                    if not same:
+                        print(f"❌ {symbol} {name} rolling({n}).{stat}() differs from pandas")
+                        ok = False
+
+                # A constant stretch: every window inside it has std 0 and an undefined z-score
+                flat = np.r_[x, np.full(2 * n, x[-1])]
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    z = zscore(flat, n)[-n:]
+                if not (np.all(rolling_std(flat, n)[-n:] == 0) and np.all(rolling_mean(flat, n)[-n:] == x[-1])
+                        and np.all(np.isnan(z))):
+                    print(f"❌ {symbol} {name} rolling({n}) on constant windows is not exact")
+                    ok = False
+    print(f"{'✅' if ok else '❌'} rolling mean/std match pandas on data/ for windows {windows}, "
+          f"constant windows give std 0")
+    raise SystemExit(0 if ok else 1)
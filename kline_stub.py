@@ -0,0 +1,195 @@
+import collections
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from data_cache import DATA_DIR, load_arrays
+from fetch_data import KLINES_WEIGHT, TokenBucket, fetch_all, fetch_incremental, store_path
+from resample import PERIOD_MS
+
+START_DATE = "2025-01-01 00:00:00"
+END_DATE = "2025-05-09 00:00:00"
+SERIES = {f"{s.lower()}_1h": (f"{s}USDT", "1h") for s in ("LTC", "BTC", "ETH", "SOL")}
+
+
+class KlineStub:
+    """
+    Local stand-in for the Binance /api/v3/klines endpoint.
+
+    Serves the candles in data/ as kline pages (startTime/endTime inclusive,
+    up to `limit` rows) plus `extra_bars` synthetic candles after the last
+    stored one, like an exchange that already has newer data. Each request
+    sleeps `latency` seconds, every `fail_every`-th request gets a 429 with
+    Retry-After, and requests over `weight_per_minute` in any rolling minute
+    get a 429 as well. The arrival (time, weight) of every request is kept
+    in `log`.
+
+    Use as a context manager; `url` is the klines endpoint to pass as base_url.
+    """
+
+    def __init__(self, data_dir=DATA_DIR, latency=0.05, fail_every=0, retry_after=0.1,
+                 weight_per_minute=None, extra_bars=24):
+        self.data_dir = data_dir
+        self.latency = latency
+        self.fail_every = fail_every
+        self.retry_after = retry_after
+        self.weight_per_minute = weight_per_minute
+        self.extra_bars = extra_bars
+        self.log = []
+        self.rejected = 0
+        self._series = {}
+        self._lock = threading.Lock()
+        self._window = collections.deque()
+
+    def _candles(self, symbol, interval):
+        key = (symbol, interval)
+        if key not in self._series:
+            base = symbol[:-4] if symbol.endswith("USDT") else symbol
+            arrays = load_arrays(base, interval.upper(), self.data_dir)
+            ts = np.asarray(arrays["timestamp"], dtype=np.int64)
+            rows = np.column_stack([np.asarray(arrays[c], dtype=float)
+                                    for c in ("open", "high", "low", "close", "volume")])
+            extra = ts[-1] + PERIOD_MS[interval.upper()] * np.arange(1, self.extra_bars + 1)
+            self._series[key] = (np.r_[ts, extra], np.r_[rows, np.repeat(rows[-1:], self.extra_bars, axis=0)])
+        return self._series[key]
+
+    def _admit(self):
+        """Status for the next request: 200, or 429 for injected/over-budget requests."""
+        with self._lock:
+            now = time.monotonic()
+            self.log.append((now, KLINES_WEIGHT))
+            n = len(self.log)
+            if self.fail_every and n % self.fail_every == 0:
+                return 429
+            if self.weight_per_minute:
+                while self._window and now - self._window[0][0] >= 60:
+                    self._window.popleft()
+                if sum(w for _, w in self._window) + KLINES_WEIGHT > self.weight_per_minute:
+                    self.rejected += 1
+                    return 429
+                self._window.append((now, KLINES_WEIGHT))
+            return 200
+
+    def page(self, symbol, interval, start_ms, end_ms, limit):
+        ts, rows = self._candles(symbol, interval)
+        lo, hi = np.searchsorted(ts, start_ms), np.searchsorted(ts, end_ms, side="right")
+        hi = min(hi, lo + limit)
+        period = PERIOD_MS[interval.upper()]
+        return [[int(t), *(f"{v:.8f}" for v in row), int(t) + period - 1, "0", 0, "0", "0", "0"]
+                for t, row in zip(ts[lo:hi], rows[lo:hi])]
+
+    def __enter__(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                status = stub._admit()
+                time.sleep(stub.latency)
+                if status != 200:
+                    body = b'{"code":-1003,"msg":"Too many requests"}'
+                    self.send_response(status)
+                    self.send_header("Retry-After", str(stub.retry_after))
+                else:
+                    body = json.dumps(stub.page(query["symbol"], query["interval"], int(query["startTime"]),
+                                                int(query["endTime"]), int(query.get("limit", 500)))).encode()
+                    self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/api/v3/klines"
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+        return False
+
+
+def max_excess_weight(log, weight_per_minute, burst_fraction=0.1):
+    """
+    Largest amount by which any run of requests exceeded what the token
+    bucket allows: capacity + refill * elapsed (<= 0 means compliant).
+    """
+    bucket = TokenBucket.per_minute(weight_per_minute, burst_fraction)
+    times = np.array([t for t, _ in log])
+    weights = np.cumsum([0] + [w for _, w in log])
+    spent = weights[1:, None] - weights[None, :-1]           # weight of requests i..j
+    allowed = bucket.capacity + bucket.refill_per_sec * (times[:, None] - times[None, :])
+    pairs = np.tril(np.ones((len(log), len(log)), dtype=bool))  # j >= i
+    return float((spent - allowed)[pairs].max()) if len(log) else 0.0
+
+
+def check_fetcher(min_speedup=1.5, weight_per_minute=240):
+    """
+    Offline checks of fetch_data against KlineStub:
+    - 4 series fetched concurrently match data/ and beat one worker by min_speedup
+    - with a small weight budget the bucket never exceeds it (no 429 from the stub's
+      rolling-minute limit, every run of requests within capacity + refill * elapsed)
+    - an incremental refresh stores nothing at or after END_DATE
+    """
+    ok = True
+    timings = {}
+    for workers in (1, 4):
+        with KlineStub(fail_every=7) as stub:
+            start = time.perf_counter()
+            data = fetch_all(SERIES, START_DATE, END_DATE, max_workers=workers, base_url=stub.url)
+            timings[workers] = time.perf_counter() - start
+    for name, df in data.items():
+        expected = load_arrays(name.split("_")[0].upper(), "1H")["timestamp"]
+        if not np.array_equal(df["timestamp"].to_numpy(dtype="datetime64[ms]").view("int64"), expected):
+            print(f"❌ {name}: fetched candles differ from data/")
+            ok = False
+    speedup = timings[1] / timings[4]
+    ok &= speedup >= min_speedup
+    print(f"{'✅' if speedup >= min_speedup else '❌'} 4 workers {timings[4]:.2f}s vs 1 worker "
+          f"{timings[1]:.2f}s ({speedup:.1f}x, need {min_speedup}x)")
+
+    with KlineStub(latency=0.01, weight_per_minute=weight_per_minute) as stub:
+        start = time.perf_counter()
+        fetch_all(SERIES, START_DATE, END_DATE, max_workers=4, weight_per_minute=weight_per_minute,
+                  base_url=stub.url)
+        elapsed = time.perf_counter() - start
+    excess = max_excess_weight(stub.log, weight_per_minute)
+    # Arrival times jitter by a few ms around the client's acquire times, so allow under one request
+    compliant = stub.rejected == 0 and excess < KLINES_WEIGHT
+    ok &= compliant
+    print(f"{'✅' if compliant else '❌'} {len(stub.log)} requests at {weight_per_minute}/min in {elapsed:.1f}s: "
+          f"{stub.rejected} over budget, max excess weight {excess:.3f}")
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        path = store_path(tmp_dir, "LTCUSDT", "1h")
+        stored = pd.read_csv(os.path.join(DATA_DIR, "LTC_1H.csv"))
+        stored.iloc[:2000].to_csv(path, index=False)
+        with KlineStub(latency=0.0) as stub:
+            end_ms = int(pd.Timestamp(END_DATE).timestamp() * 1000)
+            fetch_incremental("LTCUSDT", "1h", int(pd.Timestamp(START_DATE).timestamp() * 1000), end_ms,
+                              path, base_url=stub.url)
+        last = pd.read_csv(path)["timestamp"].iloc[-1]
+        inside = pd.Timestamp(last) < pd.Timestamp(END_DATE)
+        ok &= inside
+        print(f"{'✅' if inside else '❌'} Refreshed file ends at {last} (window ends {END_DATE})")
+    finally:
+        shutil.rmtree(tmp_dir)
+    return ok
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if check_fetcher() else 1)
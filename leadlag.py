@@ -0,0 +1,176 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_cache import DATA_DIR, load_arrays
+from resample import PERIOD_MS, finest_timeframe, resample_arrays
+
+ANCHORS = ("BTC", "ETH", "SOL")
+TIMEFRAMES = ("1H", "4H", "1D")
+
+
+def discover_symbols(data_dir=DATA_DIR, timeframe="1H"):
+    """Symbols with a <SYMBOL>_<timeframe>.csv file in data_dir."""
+    suffix = f"_{timeframe}.csv"
+    return sorted(os.path.basename(p)[:-len(suffix)] for p in glob.glob(os.path.join(data_dir, f"*{suffix}")))
+
+
+def load_closes(symbol, timeframe, data_dir=DATA_DIR):
+    """
+    Cached (timestamp ms, close) arrays for a symbol/timeframe.
+
+    When no file exists for the timeframe, bars are resampled from the
+    symbol's finest cached interval.
+    """
+    base = finest_timeframe(symbol, data_dir)
+    arrays = load_arrays(symbol, base, data_dir)
+    if base != timeframe:
+        arrays = resample_arrays(arrays, timeframe, base)
+    return np.asarray(arrays["timestamp"]), np.asarray(arrays["close"])
+
+
+def _grid_returns(timestamps, closes, t0, length, period_ms):
+    """Log returns on a regular time grid; NaN where either bar is missing."""
+    grid = np.full(length, np.nan)
+    slot = (timestamps - t0) // period_ms
+    keep = (slot >= 0) & (slot < length)
+    grid[slot[keep]] = closes[keep]
+    returns = np.full(length, np.nan)
+    returns[1:] = np.diff(np.log(grid))
+    return returns
+
+
+def _spectra(values, size):
+    """FFTs of the validity mask, the zero-filled values and their squares."""
+    valid = ~np.isnan(values)
+    v0 = np.where(valid, values, 0.0)
+    return [np.fft.rfft(a, size, axis=-1) for a in (valid.astype(float), v0, v0 * v0)]
+
+
+def _correlate_spectra(xs, ys, size, max_lag, min_periods):
+    fx_mask, fx, fxx = (np.conj(f) for f in xs)
+    fy_mask, fy, fyy = ys
+
+    def xcorr(a, b):
+        # sum_t a[t] * b[t + lag] for lag = 0..max_lag
+        return np.fft.irfft(a * b, size, axis=-1)[..., :max_lag + 1]
+
+    count = np.rint(xcorr(fx_mask, fy_mask))
+    sx, sy = xcorr(fx, fy_mask), xcorr(fx_mask, fy)
+    sxx, syy = xcorr(fxx, fy_mask), xcorr(fx_mask, fyy)
+    sxy = xcorr(fx, fy)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sxy - sx * sy / count
+        var = (sxx - sx * sx / count) * (syy - sy * sy / count)
+        corr = cov / np.sqrt(var)
+    return np.where(count >= min_periods, corr, np.nan)
+
+
+def _fft_size(n):
+    return 1 << int(np.ceil(np.log2(2 * n)))
+
+
+def lagged_correlations(anchor_returns, target_returns, max_lag, min_periods=3):
+    """
+    Pearson correlation of anchor[t - lag] with target[t] for lag = 0..max_lag.
+
+    Parameters:
+    - anchor_returns: 1-D array (NaN = missing)
+    - target_returns: 2-D array (targets x bars) on the same grid
+    - max_lag: largest lag in bars
+    - min_periods: overlapping pairs required for a non-NaN correlation
+
+    Returns:
+    - 2-D array (targets x max_lag + 1)
+
+    Every sum over the overlapping pairs (count, sums, sums of squares and the
+    cross product) is one FFT cross-correlation across all targets at once, so
+    missing bars are handled exactly and no per-lag loop is needed.
+    """
+    y = np.atleast_2d(target_returns)
+    size = _fft_size(y.shape[1])
+    return _correlate_spectra(_spectra(anchor_returns, size), _spectra(y, size), size, max_lag, min_periods)
+
+
+def scan(symbols=None, anchors=ANCHORS, timeframes=TIMEFRAMES, max_lag=48, windows=4, min_periods=30,
+         data_dir=DATA_DIR):
+    """
+    Ranks targets by how strongly and how consistently they follow each anchor.
+
+    Per timeframe, every symbol is placed on one time grid spanning the
+    anchors, and the target spectra are computed once and reused for every
+    anchor. Lags run from 0 to max_lag, capped at half a sub-window so each
+    lag has enough overlap (min_periods is relaxed to half a sub-window on
+    short daily grids). The peak is taken over lags >= 1 (a lagged
+    follower, not a co-mover); the grid is then split into `windows` equal
+    sub-windows and the correlation at the peak lag is measured in each.
+    `score` is the weakest sub-window correlation, so a target only ranks
+    high if the lagged relationship holds throughout.
+
+    Returns:
+    - DataFrame with one row per (target, anchor, timeframe), best score first
+    """
+    available = discover_symbols(data_dir)
+    symbols = symbols if symbols is not None else available
+    anchors = [a for a in anchors if a in available]
+    targets = [s for s in symbols if s not in anchors]
+    columns = ["target", "anchor", "timeframe", "peak_lag", "peak_corr",
+               "corr_lag0", "sub_mean", "sub_std", "score"]
+    if not anchors or not targets:
+        return pd.DataFrame(columns=columns)
+
+    rows = []
+    for timeframe in timeframes:
+        period = PERIOD_MS[timeframe]
+        closes = {s: load_closes(s, timeframe, data_dir) for s in anchors + targets}
+        t0 = min(closes[a][0][0] for a in anchors)
+        length = int((max(closes[a][0][-1] for a in anchors) - t0) // period) + 1
+        returns = {s: _grid_returns(*closes[s], t0, length, period) for s in closes}
+
+        bounds = np.linspace(0, length, windows + 1).astype(int)
+        sub_length = bounds[1] - bounds[0]
+        lags = max(1, min(max_lag, sub_length // 2))
+        sub_periods = min(min_periods, sub_length // 2)
+        y = np.vstack([returns[s] for s in targets])
+        size, sub_size = _fft_size(length), _fft_size(sub_length + 1)
+        y_spectra = _spectra(y, size)
+        sub_spectra = [_spectra(y[:, a:b], sub_size) for a, b in zip(bounds[:-1], bounds[1:])]
+        index = np.arange(len(targets))
+
+        for anchor in anchors:
+            x = returns[anchor]
+            corr = _correlate_spectra(_spectra(x, size), y_spectra, size, lags, min_periods)
+            follow = np.where(np.isnan(corr[:, 1:]), -np.inf, corr[:, 1:])
+            peak_lag = np.argmax(follow, axis=1) + 1
+
+            sub = np.column_stack([
+                _correlate_spectra(_spectra(x[a:b], sub_size), ys, sub_size, lags, sub_periods)[index, peak_lag]
+                for (a, b), ys in zip(zip(bounds[:-1], bounds[1:]), sub_spectra)
+            ])
+            valid = ~np.isnan(sub)
+            with np.errstate(invalid="ignore"):
+                sub_mean = np.where(valid, sub, 0).sum(axis=1) / valid.sum(axis=1)
+                sub_std = np.sqrt(np.where(valid, (sub - sub_mean[:, None]) ** 2, 0).sum(axis=1) / valid.sum(axis=1))
+            score = np.where(valid.all(axis=1), np.where(valid, sub, np.inf).min(axis=1), np.nan)
+
+            rows.append(pd.DataFrame({
+                "target": targets,
+                "anchor": anchor,
+                "timeframe": timeframe,
+                "peak_lag": peak_lag,
+                "peak_corr": corr[index, peak_lag],
+                "corr_lag0": corr[:, 0],
+                "sub_mean": sub_mean,
+                "sub_std": sub_std,
+                "score": score,
+            }))
+
+    result = pd.concat(rows, ignore_index=True)
+    return result.sort_values(["score", "peak_corr"], ascending=False, ignore_index=True, na_position="last")
+
+
+if __name__ == "__main__":
+    print(scan().to_string(index=False))
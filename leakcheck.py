@@ -0,0 +1,192 @@
+import contextlib
+import io
+import os
+import sys
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from benchmark import synthetic_candles
+from data_cache import load_candles
+from submission_check import load_strategy
+
+_WORKER = {}
+
+
+def cut_points(n_bars, min_bars=50, log_points=12, samples=8, seed=0):
+    """
+    Prefix lengths to test: geometrically spaced from min_bars to n_bars - 1
+    plus `samples` uniformly random lengths (fixed seed), sorted and unique.
+    """
+    if n_bars - 1 <= min_bars:
+        return [n_bars - 1] if n_bars > 1 else []
+    cuts = np.geomspace(min_bars, n_bars - 1, log_points).astype(int)
+    rng = np.random.default_rng(seed)
+    cuts = np.r_[cuts, rng.integers(min_bars, n_bars, samples)]
+    return sorted(set(int(c) for c in cuts))
+
+
+def first_difference(full, other, columns):
+    """
+    First row and column where two signal frames disagree (floats compared
+    with np.isclose, NaN == NaN). Returns None when they match.
+    """
+    n = min(len(full), len(other))
+    if len(full) != len(other):
+        first = {"bar": n, "column": "<length>", "expected": len(full), "got": len(other)}
+    else:
+        first = None
+
+    for column in columns:
+        a = full[column].to_numpy()[:n]
+        b = other[column].to_numpy()[:n] if column in other else np.full(n, None)
+        if a.dtype.kind in "fc" and b.dtype.kind in "fc":
+            differs = ~np.isclose(a, b, rtol=1e-9, atol=1e-12, equal_nan=True)
+        else:
+            differs = pd.Series(a).astype(object).to_numpy() != pd.Series(b).astype(object).to_numpy()
+        hits = np.flatnonzero(differs)
+        if len(hits) and (first is None or hits[0] < first["bar"]):
+            first = {"bar": int(hits[0]), "column": column, "expected": a[hits[0]], "got": b[hits[0]]}
+    return first
+
+
+def _run(candles_target, candles_anchor):
+    with contextlib.redirect_stdout(io.StringIO()):
+        out = _WORKER["generate_signals"](candles_target.copy(), candles_anchor.copy())
+    return out.reset_index(drop=True)
+
+
+def _init_worker(strategy_path, data):
+    sys.path.insert(0, os.path.dirname(os.path.abspath(strategy_path)))
+    strategy = load_strategy(strategy_path)
+    if data[0] == "synthetic":
+        candles_target, candles_anchor = synthetic_candles(*data[1:])
+    else:
+        candles_target, candles_anchor = load_candles(*data[1:])
+    _WORKER.update(
+        generate_signals=strategy.generate_signals,
+        candles_target=candles_target,
+        candles_anchor=candles_anchor,
+    )
+    _WORKER["full"] = _run(candles_target, candles_anchor)
+    _WORKER["columns"] = [c for c in _WORKER["full"].columns if c != "timestamp"]
+
+
+def _check_cut(cut):
+    """Output on the first `cut` bars versus the first `cut` rows of the full run."""
+    try:
+        prefix = _run(_WORKER["candles_target"].iloc[:cut], _WORKER["candles_anchor"].iloc[:cut])
+        return cut, first_difference(_WORKER["full"].iloc[:cut], prefix, _WORKER["columns"]), None
+    except Exception as e:
+        return cut, None, str(e)
+
+
+def _check_determinism(seed, shuffle_rows=False):
+    """Re-runs on identical input and, optionally, on shuffled rows (outputs aligned by timestamp)."""
+    full, columns = _WORKER["full"], _WORKER["columns"]
+    repeat = first_difference(full, _run(_WORKER["candles_target"], _WORKER["candles_anchor"]), columns)
+    if not shuffle_rows:
+        return repeat, None
+
+    rng = np.random.default_rng(seed)
+    target = _WORKER["candles_target"]
+    anchor = _WORKER["candles_anchor"]
+    try:
+        shuffled = _run(target.iloc[rng.permutation(len(target))], anchor.iloc[rng.permutation(len(anchor))])
+        aligned = full[["timestamp"]].merge(shuffled, on="timestamp", how="left")
+        shuffle = first_difference(full, aligned, columns)
+    except Exception as e:
+        shuffle = {"bar": None, "column": "<error>", "expected": None, "got": str(e)}
+    return repeat, shuffle
+
+
+def check_leakage(strategy_path="strategy.py", target="LTC", anchors=("BTC", "ETH"), timeframe="1H",
+                  data_dir="data", synthetic_bars=3000, min_bars=50, log_points=12, samples=8,
+                  seed=0, processes=None, shuffle_rows=False):
+    """
+    Prefix-consistency and determinism check for one strategy file.
+
+    A causal strategy gives the same output for bar i whether it sees bars
+    [0, cut) or the whole series, for every cut > i. Instead of all n
+    prefixes (O(n^2) work) this runs a logarithmic plus random set of cut
+    points in a process pool. When a cut disagrees with the full run, the
+    gap between it and the last consistent cut below it is bisected to the
+    shortest leaking prefix, and the first differing bar and column there
+    are reported.
+
+    The full input is also re-run as-is (run-to-run determinism). With
+    shuffle_rows=True it is re-run with its rows shuffled as well and the
+    output aligned back by timestamp; the strategies assume time-sorted
+    candles, so a difference there is reported for information only.
+
+    Parameters:
+    - strategy_path: strategy file to check
+    - synthetic_bars: run on this many synthetic bars (default). The
+      synthetic target follows its anchors closely, so entry rules fire far
+      more often than on the real data and data-dependent leaks surface.
+    - target, anchors, timeframe, data_dir: cached data to run on when
+      synthetic_bars is None
+    - shuffle_rows: also report whether shuffled input rows change the output
+
+    Returns:
+    - dict with 'cuts' (DataFrame, one row per cut point), 'leak' (first
+      leaking bar or None), 'repeat' and 'shuffle' (first difference or None;
+      'shuffle' is always None unless shuffle_rows)
+    """
+    data = (("synthetic", synthetic_bars, target, tuple(anchors)) if synthetic_bars
+            else ("cached", target, tuple(anchors), timeframe, data_dir))
+    _init_worker(strategy_path, data)
+    n_bars = len(_WORKER["full"])
+    cuts = cut_points(n_bars, min_bars, log_points, samples, seed)
+    processes = processes or os.cpu_count() or 1
+
+    print(f"\n🧮 Checking {strategy_path} on {len(cuts)} prefixes of {n_bars:,} bars ({processes} workers)...")
+    with Pool(processes, initializer=_init_worker, initargs=(strategy_path, data)) as pool:
+        results = sorted(pool.map(_check_cut, cuts))
+        repeat, shuffle = pool.apply(_check_determinism, (seed, shuffle_rows))
+
+        leak = None
+        bad = [cut for cut, diff, error in results if diff is not None]
+        if bad:
+            # Bisect between the last consistent cut below the first bad one and that bad cut
+            good = max([c for c, diff, error in results if diff is None and error is None and c < bad[0]],
+                       default=0)
+            lo, hi, found = good, bad[0], dict((c, d) for c, d, _ in results)[bad[0]]
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                _, diff, _ = pool.apply(_check_cut, (mid,))
+                if diff is None:
+                    lo = mid
+                else:
+                    hi, found = mid, diff
+            leak = {"cut": hi, **found}
+            leak["timestamp"] = _WORKER["full"]["timestamp"].iloc[leak["bar"]] if leak["bar"] < n_bars else None
+
+    table = pd.DataFrame([
+        {"cut": cut, "status": "error" if error else ("leak" if diff else "ok"),
+         "first_bar": diff["bar"] if diff else None, "column": diff["column"] if diff else None, "error": error}
+        for cut, diff, error in results
+    ])
+
+    if leak:
+        print(f"❌ Look-ahead leak: bar {leak['bar']} ({leak['timestamp']}) column '{leak['column']}' is "
+              f"{leak['expected']!r} on the full series but {leak['got']!r} when only the first {leak['cut']} bars are given")
+    else:
+        print("✅ Output on every tested prefix matches the full run")
+    if repeat:
+        print(f"❌ Repeated run differs at bar {repeat['bar']} column '{repeat['column']}': "
+              f"{repeat['expected']!r} vs {repeat['got']!r}")
+    else:
+        print("✅ Repeated run gives identical output")
+    if shuffle:
+        print(f"📋 Output depends on row order (expected for time-sorted input): shuffled rows change bar "
+              f"{shuffle['bar']} column '{shuffle['column']}' ({shuffle['expected']!r} vs {shuffle['got']!r})")
+    elif shuffle_rows:
+        print("✅ Shuffled input rows give identical output")
+    return {"cuts": table, "leak": leak, "repeat": repeat, "shuffle": shuffle}
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:] or ["strategy.py"]:
+        check_leakage(path)
@@ -0,0 +1,216 @@
+import numpy as np
+import pandas as pd
+
+from resample import PERIOD_MS
+
+YEAR_MS = 365 * 86_400_000  # crypto trades every day of the year
+
+
+def periods_per_year(timeframe="1H"):
+    """Bars per year for a timeframe: 8760 for 1H, 2190 for 4H, 365 for 1D."""
+    return YEAR_MS / PERIOD_MS[timeframe.upper()]
+
+
+def exposure_from_backtest(df):
+    """
+    Signed fraction of capital committed per bar, from backtest_signals output.
+
+    The fraction is taken on the bar the holdings last changed and held
+    until the next change, so price drift inside a trade does not count as
+    trading.
+    """
+    holdings = df['holdings'].to_numpy(dtype=float)
+    exposure = holdings * df['close'].to_numpy(dtype=float) / df['capital'].to_numpy(dtype=float)
+    changed = holdings != np.r_[0.0, holdings[:-1]]
+    last_change = np.maximum.accumulate(np.where(changed, np.arange(len(holdings)), 0))
+    return np.where(holdings != 0, exposure[last_change], 0.0)
+
+
+def equity_metrics(equity, position=None, timeframe="1H", initial_capital=None):
+    """
+    Scores one equity curve or a (variants x bars) matrix of them at once.
+
+    Returns and running peaks are computed once over the whole array, so a
+    batch of variants costs about as much as one curve of the same size.
+
+    Parameters:
+    - equity: 1-D capital curve or 2-D matrix, one row per variant
+    - position: signed exposure per bar (same shape, e.g. exposure_from_backtest
+      or position_state(...).astype(float)); without it exposure and turnover are NaN
+    - timeframe: '1H', '4H' or '1D', used to annualize
+    - initial_capital: starting capital (default: the first equity value)
+
+    Returns:
+    - DataFrame, one row per variant, with total and annualized return,
+      annualized Sharpe/Sortino (per-bar returns, bar 0 counted as 0 like
+      backtest_signals), Calmar, max drawdown with the bars from its peak to
+      its trough and to recovery (or the end), the longest time under
+      water, exposure (share of bars in the market) and turnover (traded
+      fraction of capital per year)
+    """
+    equity = np.atleast_2d(np.asarray(equity, dtype=float))
+    n_variants, n_bars = equity.shape
+    ppy = periods_per_year(timeframe)
+    start = equity[:, 0] if initial_capital is None else np.full(n_variants, float(initial_capital))
+    bars = np.arange(n_bars)
+
+    returns = np.zeros_like(equity)
+    returns[:, 1:] = equity[:, 1:] / equity[:, :-1] - 1
+    mean = returns.mean(axis=1)
+    std = returns.std(axis=1, ddof=1) if n_bars > 1 else np.zeros(n_variants)
+    downside = np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2, axis=1))
+
+    total = equity[:, -1] / start - 1
+    years = max(n_bars - 1, 1) / ppy
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annual = np.where(equity[:, -1] > 0, (equity[:, -1] / start) ** (1 / years) - 1, -1.0)
+        sharpe = np.where(std > 0, mean / std * np.sqrt(ppy), 0.0)
+        sortino = np.where(downside > 0, mean / downside * np.sqrt(ppy), 0.0)
+
+    peak = np.maximum.accumulate(equity, axis=1)
+    drawdown = (peak - equity) / peak
+    trough = drawdown.argmax(axis=1)
+    max_drawdown = drawdown[np.arange(n_variants), trough]
+    # Bar of the last peak at or before each bar; the deepest drawdown starts at the one before its trough
+    last_peak = np.maximum.accumulate(np.where(drawdown == 0, bars, 0), axis=1)
+    peak_bar = last_peak[np.arange(n_variants), trough]
+    recovered = (bars > trough[:, None]) & (drawdown == 0)
+    recovery_bar = np.where(recovered.any(axis=1), recovered.argmax(axis=1), n_bars - 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        calmar = np.where(max_drawdown > 0, annual / max_drawdown, np.nan)
+
+    if position is not None:
+        position = np.atleast_2d(np.asarray(position, dtype=float))
+        exposure = (position != 0).mean(axis=1)
+        traded = np.abs(np.diff(position, axis=1, prepend=0.0)).sum(axis=1) + np.abs(position[:, -1])
+        turnover = traded / years
+    else:
+        exposure = turnover = np.full(n_variants, np.nan)
+
+    return pd.DataFrame({
+        'final_capital': np.round(equity[:, -1], 2),
+        'total_return_pct': np.round(total * 100, 2),
+        'annual_return_pct': np.round(annual * 100, 2),
+        'sharpe_ratio': np.round(sharpe, 4),
+        'sortino_ratio': np.round(sortino, 4),
+        'calmar_ratio': np.round(calmar, 4),
+        'max_drawdown_pct': np.round(max_drawdown * 100, 2),
+        'drawdown_bars': trough - peak_bar,
+        'recovery_bars': np.where(max_drawdown > 0, recovery_bar - peak_bar, 0),
+        'max_underwater_bars': (bars - last_peak).max(axis=1),
+        'exposure_pct': np.round(exposure * 100, 2),
+        'turnover_per_year': np.round(turnover, 2),
+    })
+
+
+def trade_ledger(equity, position, price=None, timestamps=None):
+    """
+    One row per trade, found with array ops on the position changes.
+
+    A trade opens on the bar its position becomes non-zero (or flips sign)
+    and closes on the bar it returns to zero (or flips). Its pnl is the
+    equity at the exit bar minus the equity on the bar before entry, so it
+    includes both fees. Trades still open on the last bar close there with
+    open=True.
+
+    Parameters:
+    - equity, position: 1-D arrays or (variants x bars) matrices
+    - price: optional price per bar for entry/exit prices
+    - timestamps: optional timestamps per bar for entry/exit times
+
+    Returns:
+    - DataFrame with variant, entry_bar, exit_bar, side, size, pnl,
+      return_pct, holding_bars, open (+ prices and times when given)
+    """
+    equity = np.atleast_2d(np.asarray(equity, dtype=float))
+    position = np.atleast_2d(np.asarray(position, dtype=float))
+    n_bars = equity.shape[1]
+
+    # Pad a flat bar on each side so every trade has both an entry and an exit edge
+    padded = np.pad(position, ((0, 0), (1, 1)))
+    prev, cur = padded[:, :-1], padded[:, 1:]
+    changed = cur != prev
+    variant, entry_bar = np.nonzero(changed & (cur != 0))
+    _, exit_edge = np.nonzero(changed & (prev != 0))
+    is_open = exit_edge == n_bars
+    exit_bar = np.minimum(exit_edge, n_bars - 1)
+
+    before = equity[variant, np.maximum(entry_bar - 1, 0)]
+    pnl = equity[variant, exit_bar] - before
+    entry_position = position[variant, entry_bar]
+    ledger = pd.DataFrame({
+        'variant': variant,
+        'entry_bar': entry_bar,
+        'exit_bar': exit_bar,
+        'side': np.sign(entry_position).astype(np.int8),
+        'size': np.abs(entry_position),
+        'pnl': pnl,
+        'return_pct': pnl / before * 100,
+        'holding_bars': exit_bar - entry_bar,
+        'open': is_open,
+    })
+    if price is not None:
+        price = np.asarray(price, dtype=float)
+        ledger['entry_price'] = price[entry_bar]
+        ledger['exit_price'] = price[exit_bar]
+    if timestamps is not None:
+        timestamps = np.asarray(timestamps)
+        ledger['entry_time'] = timestamps[entry_bar]
+        ledger['exit_time'] = timestamps[exit_bar]
+    return ledger
+
+
+def trade_stats(ledger, n_variants=None):
+    """Trade count, win rate, average return and holding time per variant."""
+    closed = ledger[~ledger['open']]
+    grouped = closed.groupby('variant')
+    stats = pd.DataFrame({
+        'trades': grouped.size(),
+        'win_rate_pct': grouped['pnl'].apply(lambda pnl: (pnl > 0).mean() * 100).round(2),
+        'avg_trade_pct': grouped['return_pct'].mean().round(3),
+        'avg_holding_bars': grouped['holding_bars'].mean().round(1),
+    })
+    if n_variants is not None:
+        stats = stats.reindex(range(n_variants)).fillna({'trades': 0})
+    return stats
+
+
+def backtest_report(df, timeframe="1H", initial_capital=1000.0):
+    """
+    equity_metrics and trade_ledger for one backtest_signals DataFrame.
+
+    Returns:
+    - dict of metrics (including trade stats)
+    - trade ledger DataFrame with prices and timestamps
+    """
+    position = exposure_from_backtest(df)
+    summary = equity_metrics(df['capital'], position, timeframe, initial_capital)
+    ledger = trade_ledger(df['capital'], position, df['close'], df['timestamp'])
+    stats = trade_stats(ledger, 1)
+    return {**summary.iloc[0].to_dict(), **stats.iloc[0].to_dict()}, ledger.drop(columns='variant')
+
+
+if __name__ == "__main__":
+    import time
+
+    from backtest import backtest_batch, backtest_signals, position_state, stack_signals
+    from data_cache import load_candles
+    from exit_kernel import VECTORIZED
+
+    candles_target, candles_anchor = load_candles()
+    signals = {name: fn(candles_target, candles_anchor) for name, fn in VECTORIZED.items()}
+    rows = {}
+    for name, frame in signals.items():
+        df, _ = backtest_signals(frame, candles_target, engine="position")
+        rows[name], _ = backtest_report(df)
+    print(pd.DataFrame(rows).T.to_string())
+
+    # Scoring a batch of variants: one call on the whole capital matrix
+    names, timestamps, matrix = stack_signals(signals)
+    matrix = np.repeat(matrix, 1000 // len(names) + 1, axis=0)[:1000]
+    capital, _, _ = backtest_batch(matrix, timestamps, candles_target)
+    position = position_state(matrix).astype(float)
+    start = time.perf_counter()
+    equity_metrics(capital, position)
+    trade_ledger(capital, position)
+    print(f"\n⏱️ Scored {len(capital):,} variants x {capital.shape[1]:,} bars in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,133 @@
+import functools
+
+import numpy as np
+import pandas as pd
+
+from data_cache import DATA_DIR, OHLCV_COLUMNS, frame_from_arrays, load_arrays
+
+
+class Panel:
+    """
+    Target and anchor OHLCV aligned once on a shared int64 time index.
+
+    All values live in one contiguous float64 array laid out as
+    (symbol, field, bar), so every column is a contiguous slice; `array`
+    exposes the same memory as (symbol, bar, field). `mask` marks the bars
+    each symbol actually has (False = gap, values NaN). The frame methods
+    return zero-copy, read-only DataFrame views in the layouts the
+    strategies expect, so no timestamp merge is needed after the panel is
+    built.
+    """
+
+    def __init__(self, symbols, timestamps, values, mask, fields=OHLCV_COLUMNS):
+        self.symbols = list(symbols)
+        self.fields = list(fields)
+        # Frames and slices alias these arrays, so a strategy writing into its input must not reach them
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.timestamps.flags.writeable = False
+        self.values = values
+        self.values.flags.writeable = False
+        self.mask = mask
+        self.mask.flags.writeable = False
+
+    @classmethod
+    def from_arrays(cls, arrays_by_symbol, how="inner", fields=OHLCV_COLUMNS):
+        """
+        Builds a panel from {symbol: {'timestamp': int64 ms, field: array}}.
+
+        how='inner' keeps bars every symbol has (what the strategies' merges
+        do); how='outer' keeps every bar and records gaps in `mask`.
+        """
+        symbols = list(arrays_by_symbol)
+        stamps = [np.asarray(arrays_by_symbol[s]["timestamp"], dtype=np.int64) for s in symbols]
+        combine = np.intersect1d if how == "inner" else np.union1d
+        timestamps = functools.reduce(combine, stamps)
+
+        values = np.full((len(symbols), len(fields), len(timestamps)), np.nan)
+        mask = np.zeros((len(symbols), len(timestamps)), dtype=bool)
+        for i, (symbol, ts) in enumerate(zip(symbols, stamps)):
+            pos = np.searchsorted(timestamps, ts)
+            found = (pos < len(timestamps)) & (timestamps[np.minimum(pos, len(timestamps) - 1)] == ts)
+            mask[i, pos[found]] = True
+            for j, field in enumerate(fields):
+                values[i, j, pos[found]] = np.asarray(arrays_by_symbol[symbol][field])[found]
+        return cls(symbols, timestamps, values, mask, fields)
+
+    @classmethod
+    def from_cache(cls, target="LTC", anchors=("BTC", "ETH"), timeframe="1H", data_dir=DATA_DIR, how="inner"):
+        """Builds a panel from the memory-mapped cache; the target is symbol 0."""
+        symbols = [target] + [a for a in anchors if a != target]
+        return cls.from_arrays({s: load_arrays(s, timeframe, data_dir) for s in symbols}, how)
+
+    @property
+    def target(self):
+        return self.symbols[0]
+
+    @property
+    def anchors(self):
+        return self.symbols[1:]
+
+    @property
+    def array(self):
+        """(symbol, bar, field) view of the values."""
+        return self.values.transpose(0, 2, 1)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def column(self, symbol, field):
+        """Contiguous view of one symbol's field."""
+        return self.values[self.symbols.index(symbol), self.fields.index(field)]
+
+    def gaps(self):
+        """Number of missing bars per symbol."""
+        return dict(zip(self.symbols, (~self.mask).sum(axis=1).tolist()))
+
+    def slice(self, start=None, stop=None):
+        """Panel view of bars [start, stop) sharing this panel's memory."""
+        bars = slice(start, stop)
+        return Panel(self.symbols, self.timestamps[bars], self.values[:, :, bars], self.mask[:, bars], self.fields)
+
+    def _timestamp(self):
+        return self.timestamps.view("datetime64[ms]")
+
+    def target_frame(self):
+        """candles_target layout: timestamp + plain OHLCV columns of the target."""
+        return frame_from_arrays({"timestamp": self._timestamp(),
+                                  **{f: self.values[0, j] for j, f in enumerate(self.fields)}})
+
+    def anchor_frame(self, symbols=None):
+        """candles_anchor layout: timestamp + '<field>_<SYMBOL>' for every anchor."""
+        columns = {"timestamp": self._timestamp()}
+        for symbol in symbols or self.anchors:
+            i = self.symbols.index(symbol)
+            columns.update({f"{f}_{symbol}": self.values[i, j] for j, f in enumerate(self.fields)})
+        return frame_from_arrays(columns)
+
+    def wide_frame(self):
+        """Every symbol in '<field>_<SYMBOL>' layout, target included (the strategies' merged df)."""
+        return self.anchor_frame(self.symbols)
+
+
+def join_on_timestamp(left, right, how="inner"):
+    """
+    left.merge(right, on='timestamp', how=how) without hashing when both
+    frames already share the same timestamps in the same order.
+
+    Frames cut from one Panel (or from load_candles) always do, so the
+    strategies' hot path skips the merge; anything else falls back to it.
+    """
+    lt, rt = left["timestamp"].to_numpy(), right["timestamp"].to_numpy()
+    if len(lt) == len(rt) and lt.dtype == rt.dtype and np.array_equal(lt, rt):
+        right = right.drop(columns="timestamp")
+        right.index = left.index
+        return pd.concat([left, right], axis=1).reset_index(drop=True)
+    return left.merge(right, on="timestamp", how=how)
+
+
+if __name__ == "__main__":
+    panel = Panel.from_cache("LTC", ("BTC", "ETH", "SOL"))
+    candles_target, candles_anchor = panel.target_frame(), panel.anchor_frame()
+    shared = np.shares_memory(candles_anchor["close_BTC"].to_numpy(), panel.values)
+    print(f"✅ Panel {panel.symbols} x {len(panel):,} bars x {len(panel.fields)} fields, gaps {panel.gaps()}")
+    print(f"{'✅' if shared else '❌'} Column views {'share' if shared else 'do not share'} the panel memory")
@@ -0,0 +1,186 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_cache import DATA_DIR, OHLCV_COLUMNS, load_arrays, load_ohlcv
+
+PERIOD_MS = {"1H": 3_600_000, "4H": 14_400_000, "1D": 86_400_000}
+AGGREGATIONS = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+
+
+def _bucket_bounds(timestamps, period_ms):
+    """Start/end row of each epoch-aligned bucket in a sorted int64 ms series."""
+    bucket = timestamps // period_ms
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(bucket)] - 1
+    return bucket[starts] * period_ms, starts, ends
+
+
+def _aggregate(values, how, starts, ends):
+    values = np.asarray(values, dtype=float)
+    if how == "first":
+        return values[starts]
+    if how == "last":
+        return values[ends]
+    if how == "max":
+        return np.maximum.reduceat(values, starts)
+    if how == "min":
+        return np.minimum.reduceat(values, starts)
+    if how == "sum":
+        return np.add.reduceat(values, starts)
+    raise ValueError(f"❌ Unknown aggregation: {how}")
+
+
+def _field(column):
+    """'close_BTC' -> 'close'; None for columns that are not OHLCV."""
+    field = column.split("_", 1)[0]
+    return field if field in AGGREGATIONS else None
+
+
+def _epoch_ms(timestamps):
+    values = np.asarray(timestamps)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ms]").astype(np.int64)
+    return values.astype(np.int64)
+
+
+def resample_arrays(arrays, timeframe, base_timeframe="1H", drop_incomplete=False):
+    """
+    Aggregates OHLCV arrays into a coarser epoch-aligned timeframe.
+
+    Buckets are found by integer division of the epoch milliseconds and each
+    column is reduced in one ufunc.reduceat call (open=first, high=max,
+    low=min, close=last, volume=sum), the same way the exchange builds its
+    4H and 1D candles from UTC-aligned intervals.
+
+    Parameters:
+    - arrays: dict with 'timestamp' (int64 ms, sorted) and OHLCV arrays
+    - timeframe: target timeframe, e.g. '4H' or '1D'
+    - base_timeframe: timeframe of the input bars
+    - drop_incomplete: drop buckets with missing input bars (e.g. a partial last day)
+
+    Returns:
+    - dict with 'timestamp', the OHLCV columns and 'bars' (input bars per bucket)
+    """
+    period = PERIOD_MS[timeframe]
+    per_bucket = period // PERIOD_MS[base_timeframe]
+    timestamps, starts, ends = _bucket_bounds(_epoch_ms(arrays["timestamp"]), period)
+
+    out = {"timestamp": timestamps}
+    for name in OHLCV_COLUMNS:
+        out[name] = _aggregate(arrays[name], AGGREGATIONS[name], starts, ends)
+    out["bars"] = ends - starts + 1
+
+    if drop_incomplete:
+        keep = out["bars"] == per_bucket
+        out = {name: values[keep] for name, values in out.items()}
+    return out
+
+
+def finest_timeframe(symbol, data_dir=DATA_DIR):
+    """Smallest timeframe with a <SYMBOL>_<timeframe>.csv file, or None."""
+    for timeframe in sorted(PERIOD_MS, key=PERIOD_MS.get):
+        if os.path.exists(os.path.join(data_dir, f"{symbol}_{timeframe}.csv")):
+            return timeframe
+    return None
+
+
+def load_resampled(symbol, timeframe, data_dir=DATA_DIR, drop_incomplete=False):
+    """
+    Loads a symbol at `timeframe`, derived from its finest cached interval.
+
+    Returns a DataFrame with the same columns as data_cache.load_ohlcv plus
+    'bars', so only the 1H files need to be downloaded and stored.
+    """
+    base = finest_timeframe(symbol, data_dir)
+    if base is None:
+        raise FileNotFoundError(f"❌ No cached data for {symbol} in {data_dir}")
+    if PERIOD_MS[base] > PERIOD_MS[timeframe]:
+        raise ValueError(f"❌ Cannot build {timeframe} bars from {base} data for {symbol}")
+    if base == timeframe:
+        return load_ohlcv(symbol, timeframe, data_dir)
+
+    out = resample_arrays(load_arrays(symbol, base, data_dir), timeframe, base, drop_incomplete)
+    out["timestamp"] = out["timestamp"].view("datetime64[ms]")
+    return pd.DataFrame(out)
+
+
+def check_against_exchange(symbol, timeframe="4H", base_timeframe="1H", data_dir=DATA_DIR):
+    """
+    Compares locally resampled bars with the exchange-provided file.
+
+    Returns:
+    - dict with the number of matched bars, bars missing on either side and
+      the largest relative difference per OHLCV column
+    """
+    local = resample_arrays(load_arrays(symbol, base_timeframe, data_dir), timeframe, base_timeframe,
+                            drop_incomplete=True)
+    exchange = load_arrays(symbol, timeframe, data_dir)
+    common, i, j = np.intersect1d(local["timestamp"], np.asarray(exchange["timestamp"]), return_indices=True)
+
+    report = {
+        "symbol": symbol,
+        "timeframe": timeframe,
+        "bars": len(common),
+        "only_local": len(local["timestamp"]) - len(common),
+        "only_exchange": len(exchange["timestamp"]) - len(common),
+    }
+    for name in OHLCV_COLUMNS:
+        a, b = local[name][i], np.asarray(exchange[name])[j]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rel = np.abs(a - b) / np.maximum(np.abs(b), 1e-12)
+        report[f"{name}_max_rel_diff"] = float(rel.max()) if len(rel) else np.nan
+    return report
+
+
+def multi_timeframe_panel(candles, timeframes=("4H", "1D"), base_timeframe="1H"):
+    """
+    Adds higher-timeframe bars to a base-timeframe frame without look-ahead.
+
+    Every OHLCV column (plain 'close' or anchor-style 'close_BTC') is
+    aggregated per higher timeframe, and each base row gets the values of
+    the last higher-timeframe bar that had fully closed when the row closed.
+    Columns are named '<column>_<timeframe>', e.g. 'close_BTC_4H'. Bars
+    built from a partial bucket at the start of the data are left NaN.
+
+    Parameters:
+    - candles: DataFrame with a 'timestamp' column and OHLCV columns
+    - timeframes: higher timeframes to add
+    - base_timeframe: timeframe of `candles`
+
+    Returns:
+    - copy of candles with the added columns
+    """
+    ts = _epoch_ms(candles["timestamp"])
+    columns = [c for c in candles.columns if _field(c)]
+    out = candles.copy()
+    if not len(ts):
+        return out
+    base_period = PERIOD_MS[base_timeframe]
+
+    for timeframe in timeframes:
+        period = PERIOD_MS[timeframe]
+        starts_ms, starts, ends = _bucket_bounds(ts, period)
+        complete = np.ones(len(starts), dtype=bool)
+        complete[0] = ts[0] == starts_ms[0]
+
+        # Row of the last bucket that closed at or before each base bar's close
+        visible = np.searchsorted(starts_ms + period, ts + base_period, side="right") - 1
+        ok = visible >= 0
+        ok[ok] &= complete[visible[ok]]
+        rows = np.where(ok, visible, 0)
+
+        for column in columns:
+            values = _aggregate(candles[column].to_numpy(dtype=float), AGGREGATIONS[_field(column)], starts, ends)
+            out[f"{column}_{timeframe}"] = np.where(ok, values[rows], np.nan)
+    return out
+
+
+if __name__ == "__main__":
+    for symbol in ["BTC", "ETH", "SOL", "LTC"]:
+        report = check_against_exchange(symbol, "4H")
+        worst = max(v for k, v in report.items() if k.endswith("_max_rel_diff"))
+        status = "✅" if worst < 1e-9 and not report["only_exchange"] else "❌"
+        print(f"{status} {symbol} 4H: {report['bars']} bars, max rel diff {worst:.2e}, "
+              f"missing locally {report['only_exchange']}")
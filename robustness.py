@@ -0,0 +1,162 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from metrics import exposure_from_backtest, periods_per_year, trade_ledger
+
+STATS = ("total_return_pct", "sharpe_ratio", "max_drawdown_pct")
+
+
+def stationary_bootstrap_indices(n_bars, n_samples, mean_block, rng):
+    """
+    (n_samples x n_bars) resampling indices for the stationary bootstrap.
+
+    Each position starts a new block with probability 1 / mean_block at a
+    uniform random bar; otherwise it continues the previous block (wrapping
+    around at the end). Block starts are carried forward with
+    maximum.accumulate, so no loop over positions is needed.
+    """
+    bars = np.arange(n_bars)
+    new_block = rng.random((n_samples, n_bars)) < 1.0 / mean_block
+    new_block[:, 0] = True
+    starts = rng.integers(0, n_bars, (n_samples, n_bars))
+    block_start = np.maximum.accumulate(np.where(new_block, bars, 0), axis=1)
+    return (np.take_along_axis(starts, block_start, axis=1) + bars - block_start) % n_bars
+
+
+def path_stats(returns, periods=1.0):
+    """
+    Total return, Sharpe (annualized by `periods` per year) and max drawdown
+    of every row of a (samples x steps) return matrix.
+    """
+    returns = np.atleast_2d(returns)
+    equity = np.cumprod(1 + returns, axis=1)
+    std = returns.std(axis=1, ddof=1) if returns.shape[1] > 1 else np.zeros(len(returns))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, returns.mean(axis=1) / std * np.sqrt(periods), 0.0)
+    # The curve starts at 1.0 before the first return
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+    return {
+        "total_return_pct": (equity[:, -1] - 1) * 100,
+        "sharpe_ratio": sharpe,
+        "max_drawdown_pct": ((peak - equity) / peak).max(axis=1) * 100,
+    }
+
+
+def _batched(n_samples, batch_size, resample):
+    # Resamples in fixed-size batches so 10k x 3k paths never sit in memory at once
+    parts = [resample(min(batch_size, n_samples - done)) for done in range(0, n_samples, batch_size)]
+    return pd.DataFrame({name: np.concatenate([p[name] for p in parts]) for name in STATS})
+
+
+def block_bootstrap(returns, n_samples=10_000, mean_block=None, timeframe="1H", seed=0, batch_size=1000):
+    """
+    Stationary block bootstrap of per-bar returns.
+
+    Parameters:
+    - returns: 1-D per-bar returns (e.g. backtest capital pct_change)
+    - mean_block: average block length in bars (default: n ** (1/3)), long
+      enough to keep volatility clustering and trade runs together
+    - seed: fixed seed, so the same inputs give the same intervals
+
+    Returns:
+    - DataFrame of STATS, one row per resample
+    """
+    returns = np.asarray(returns, dtype=float)
+    mean_block = mean_block or max(1.0, round(len(returns) ** (1 / 3)))
+    rng = np.random.default_rng(seed)
+    periods = periods_per_year(timeframe)
+
+    def resample(size):
+        return path_stats(returns[stationary_bootstrap_indices(len(returns), size, mean_block, rng)], periods)
+
+    return _batched(n_samples, batch_size, resample)
+
+
+def trade_resample(trade_returns, n_samples=10_000, replace=False, seed=0, batch_size=1000):
+    """
+    Resamples the order of closed trades.
+
+    replace=False permutes the trades: the final return is unchanged but
+    the drawdown shows how much depended on the order they came in.
+    replace=True draws trades with replacement (i.i.d. bootstrap), which
+    also spreads the return. Sharpe here is per trade, not annualized.
+    """
+    trade_returns = np.asarray(trade_returns, dtype=float)
+    rng = np.random.default_rng(seed)
+
+    def resample(size):
+        if replace:
+            sample = trade_returns[rng.integers(0, len(trade_returns), (size, len(trade_returns)))]
+        else:
+            sample = rng.permuted(np.broadcast_to(trade_returns, (size, len(trade_returns))), axis=1)
+        return path_stats(sample)
+
+    return _batched(n_samples, batch_size, resample)
+
+
+def confidence_intervals(samples, observed, confidence=0.9):
+    """
+    Percentile interval, median and the share of resamples at or below zero
+    (or, for drawdown, at or above the observed value) for every statistic.
+    Both comparisons allow a relative tolerance of 1e-9 for rounding.
+    """
+    tail = (1 - confidence) / 2
+    rows = []
+    for name in STATS:
+        values = samples[name].to_numpy()
+        low, median, high = np.nanquantile(values, [tail, 0.5, 1 - tail])
+        # Reordered trades compound to the same result up to rounding, which must not count as worse
+        tol = 1e-9 * max(1.0, abs(observed[name]))
+        worse = values >= observed[name] - tol if name == "max_drawdown_pct" else values <= tol
+        rows.append({"stat": name, "observed": observed[name], "low": low, "median": median,
+                     "high": high, "p_worse": worse.mean()})
+    return pd.DataFrame(rows).set_index("stat")
+
+
+def robustness_report(df, timeframe="1H", n_samples=10_000, mean_block=None, confidence=0.9, seed=0):
+    """
+    Bootstrap and Monte Carlo confidence intervals for one backtest.
+
+    Parameters:
+    - df: backtest_signals output (needs 'capital', 'holdings', 'close')
+    - n_samples: resamples per method
+    - confidence: two-sided interval width (0.9 -> 5th to 95th percentile)
+
+    Returns:
+    - DataFrame indexed by (method, stat) with observed value, interval,
+      median and p_worse. Methods: 'block_bootstrap' on bar returns,
+      'trade_permutation' and 'trade_bootstrap' on closed-trade returns
+      (skipped with fewer than two trades)
+    """
+    capital = df["capital"].to_numpy(dtype=float)
+    returns = capital[1:] / capital[:-1] - 1
+    periods = periods_per_year(timeframe)
+    observed = {k: v[0] for k, v in path_stats(returns, periods).items()}
+    tables = {"block_bootstrap": confidence_intervals(
+        block_bootstrap(returns, n_samples, mean_block, timeframe, seed), observed, confidence)}
+
+    ledger = trade_ledger(capital, exposure_from_backtest(df))
+    trade_returns = ledger.loc[~ledger["open"], "return_pct"].to_numpy() / 100
+    if len(trade_returns) >= 2:
+        per_trade = {k: v[0] for k, v in path_stats(trade_returns).items()}
+        for method, replace in (("trade_permutation", False), ("trade_bootstrap", True)):
+            samples = trade_resample(trade_returns, n_samples, replace, seed)
+            tables[method] = confidence_intervals(samples, per_trade, confidence)
+    return pd.concat(tables, names=["method"]).round(4)
+
+
+if __name__ == "__main__":
+    from backtest import backtest_signals
+    from data_cache import load_candles
+    from exit_kernel import VECTORIZED
+
+    candles_target, candles_anchor = load_candles()
+    for name, generate_signals in VECTORIZED.items():
+        df, _ = backtest_signals(generate_signals(candles_target, candles_anchor), candles_target,
+                                 engine="position")
+        start = time.perf_counter()
+        report = robustness_report(df)
+        print(f"\n📊 {name} ({time.perf_counter() - start:.1f}s)")
+        print(report.to_string())
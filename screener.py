@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+from data_cache import DATA_DIR, load_arrays
+from leadlag import discover_symbols
+
+MIN_AVG_VOLUME_USD = 5_000_000  # $5M threshold
+WINDOW_START = "2025-01-01"     # 00:00:00 UTC, inclusive
+WINDOW_END = "2025-05-09"       # 00:00:00 UTC, exclusive
+DAY_MS = 86_400_000
+
+
+def _epoch_ms(value):
+    """Epoch milliseconds for a date string, Timestamp or datetime64/int64 array."""
+    if isinstance(value, (str, pd.Timestamp)):
+        return pd.Timestamp(value).value // 1_000_000
+    values = np.asarray(value)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ms]").astype(np.int64)
+    return values.astype(np.int64)
+
+
+def average_daily_usd_volume(timestamps, close, volume, start=WINDOW_START, end=WINDOW_END):
+    """
+    Average daily quote (USD) volume of one series over [start, end).
+
+    Bars are bucketed into UTC days by integer division of the epoch
+    milliseconds. Every calendar day in the window counts, so days with no
+    bars (e.g. before a listing) count as zero volume.
+    """
+    start_ms, end_ms = _epoch_ms(start), _epoch_ms(end)
+    ts = _epoch_ms(timestamps)
+    keep = (ts >= start_ms) & (ts < end_ms)
+    usd = np.asarray(close, dtype=float)[keep] * np.asarray(volume, dtype=float)[keep]
+    return float(np.nansum(usd)) / max(-(-(end_ms - start_ms) // DAY_MS), 1)
+
+
+def screen(symbols=None, timeframe="1H", start=WINDOW_START, end=WINDOW_END,
+           min_avg_volume=MIN_AVG_VOLUME_USD, data_dir=DATA_DIR):
+    """
+    Average daily USD volume of every cached symbol over the official window.
+
+    All symbols are concatenated and summed per (symbol, day) with a single
+    np.bincount, so the cost is one pass over the bars regardless of how many
+    symbols there are.
+
+    Parameters:
+    - symbols: list of symbols (default: every <SYMBOL>_<timeframe>.csv in data_dir)
+    - timeframe: which cached series to read
+    - start, end: window bounds (end exclusive)
+    - min_avg_volume: eligibility threshold in USD
+
+    Returns:
+    - DataFrame with symbol, avg_daily_usd_volume, min/median daily volume,
+      days_with_data and eligible, sorted by volume (largest first)
+    """
+    symbols = list(symbols) if symbols is not None else discover_symbols(data_dir, timeframe)
+    columns = ["symbol", "avg_daily_usd_volume", "median_daily_usd_volume",
+               "min_daily_usd_volume", "days_with_data", "eligible"]
+    if not symbols:
+        return pd.DataFrame(columns=columns)
+
+    start_ms, end_ms = _epoch_ms(start), _epoch_ms(end)
+    first_day = start_ms // DAY_MS
+    n_days = max(-(-(end_ms - start_ms) // DAY_MS), 1)
+
+    keys, usd = [], []
+    for i, symbol in enumerate(symbols):
+        arrays = load_arrays(symbol, timeframe, data_dir)
+        ts = np.asarray(arrays["timestamp"])
+        lo, hi = np.searchsorted(ts, [start_ms, end_ms])
+        keys.append(i * n_days + (ts[lo:hi] // DAY_MS - first_day))
+        usd.append(np.nan_to_num(arrays["close"][lo:hi] * arrays["volume"][lo:hi]))
+
+    keys = np.concatenate(keys)
+    daily = np.bincount(keys, weights=np.concatenate(usd), minlength=len(symbols) * n_days)
+    daily = daily.reshape(len(symbols), n_days)
+    has_data = np.bincount(keys, minlength=len(symbols) * n_days).reshape(len(symbols), n_days) > 0
+
+    avg = daily.mean(axis=1)
+    result = pd.DataFrame({
+        "symbol": symbols,
+        "avg_daily_usd_volume": avg,
+        "median_daily_usd_volume": np.median(daily, axis=1),
+        "min_daily_usd_volume": daily.min(axis=1),
+        "days_with_data": has_data.sum(axis=1),
+        "eligible": avg >= min_avg_volume,
+    })
+    return result.sort_values("avg_daily_usd_volume", ascending=False, ignore_index=True)
+
+
+def eligible_universe(**kwargs):
+    """Symbols that pass the volume rule, largest volume first."""
+    result = screen(**kwargs)
+    return result.loc[result["eligible"], "symbol"].tolist()
+
+
+if __name__ == "__main__":
+    result = screen()
+    print(result.to_string(index=False, float_format=lambda v: f"{v:,.0f}"))
+    print(f"\n✅ {int(result['eligible'].sum())}/{len(result)} symbols meet the "
+          f"${MIN_AVG_VOLUME_USD:,} average daily volume rule ({WINDOW_START} – {WINDOW_END})")
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+# Internal signal codes; SIGNAL_NAMES[code + 1] is the public string
+SELL, HOLD, BUY = -1, 0, 1
+SIGNAL_NAMES = np.array(["SELL", "HOLD", "BUY"], dtype=object)
+SIGNAL_DTYPE = pd.CategoricalDtype(["SELL", "HOLD", "BUY"])
+
+
+def encode(signals):
+    """
+    Converts BUY/SELL/HOLD values (strings, categorical or already-encoded
+    integers, 1-D or 2-D) into int8 codes: SELL=-1, HOLD=0, BUY=1.
+
+    Raises ValueError on anything else.
+    """
+    if isinstance(signals, (pd.Series, pd.Index)) and isinstance(signals.dtype, pd.CategoricalDtype):
+        signals = signals.astype(SIGNAL_DTYPE) if signals.dtype != SIGNAL_DTYPE else signals
+        codes = np.asarray(signals.cat.codes if isinstance(signals, pd.Series) else signals.codes)
+        if (codes < 0).any():
+            raise ValueError(f"❌ Invalid signal values found: {invalid_signals(signals)}")
+        return (codes - 1).astype(np.int8)
+
+    values = np.asarray(signals)
+    if values.dtype.kind in "iub":
+        if values.size and (values.min() < SELL or values.max() > BUY):
+            raise ValueError("❌ Signal codes must be -1, 0 or 1")
+        return values.astype(np.int8)
+
+    codes = np.full(values.shape, 2, dtype=np.int8)
+    for code, name in zip((SELL, HOLD, BUY), SIGNAL_NAMES):
+        codes[values == name] = code
+    if (codes == 2).any():
+        raise ValueError(f"❌ Invalid signal values found: {set(values[codes == 2].tolist())}")
+    return codes
+
+
+def decode(codes):
+    """int8 codes -> pandas Categorical of 'SELL'/'HOLD'/'BUY' (1 byte per bar)."""
+    return pd.Categorical.from_codes(np.asarray(codes, dtype=np.int8) + 1, dtype=SIGNAL_DTYPE)
+
+
+def signal_frame(timestamps, codes, **columns):
+    """Public ['timestamp', 'signal', ...] frame with a categorical signal column."""
+    df = pd.DataFrame({"timestamp": timestamps})
+    df["signal"] = decode(codes)
+    for name, values in columns.items():
+        df[name] = values
+    return df
+
+
+def invalid_signals(signals, allowed=SIGNAL_NAMES):
+    """Set of values that are not in `allowed`, found with one vectorized isin."""
+    signals = pd.Series(np.asarray(signals, dtype=object).ravel()) if not isinstance(signals, pd.Series) else signals
+    return set(signals[~signals.isin(list(allowed))].tolist())
+
+
+def downcast(df, columns=None, dtype=np.float32):
+    """
+    Copy of df with float64 columns (or `columns`) stored as float32.
+
+    Halves the memory of price and feature columns. Threshold comparisons
+    can flip on values that sit within float32 rounding of a threshold, so
+    check metrics against a float64 run before relying on it.
+    """
+    columns = columns if columns is not None else [c for c in df.columns if df[c].dtype == np.float64]
+    return df.astype({c: dtype for c in columns})
+
+
+def memory_mb(*frames):
+    """Deep memory usage of DataFrames in MB."""
+    return sum(f.memory_usage(deep=True).sum() for f in frames) / 2**20
+
+
+if __name__ == "__main__":
+    from backtest import backtest_signals
+    from benchmark import synthetic_candles
+    from data_cache import load_candles
+    from exit_kernel import VECTORIZED
+
+    # Metrics must not change when signals travel as codes/categoricals instead of strings
+    candles_target, candles_anchor = load_candles()
+    for name, generate_signals in VECTORIZED.items():
+        signals = generate_signals(candles_target, candles_anchor)
+        as_strings = signals.assign(signal=signals["signal"].astype(object))
+        _, expected = backtest_signals(as_strings, candles_target)
+        _, actual = backtest_signals(signals, candles_target)
+        _, lean = backtest_signals(generate_signals(downcast(candles_target), downcast(candles_anchor)),
+                                   candles_target)
+        same = expected == actual
+        print(f"{'✅' if same else '❌'} {name}: categorical signals {'match' if same else 'differ from'} strings"
+              f"{'' if lean == expected else f' (float32 features: {lean})'}")
+
+    n_bars = 3_000_000
+    candles_target, candles_anchor = synthetic_candles(n_bars)
+    signals = VECTORIZED["strategy1"](candles_target, candles_anchor)
+    wide = signals.assign(signal=signals["signal"].astype(object))
+    features = candles_target.drop(columns="timestamp")
+    before = memory_mb(wide, features)
+    after = memory_mb(signals, downcast(features))
+    print(f"\n🧮 {n_bars:,} bars: signals + features {before:,.0f} MB as strings/float64, "
+          f"{after:,.0f} MB as categorical/float32 ({before / after:.1f}x smaller)")
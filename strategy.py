@@ -2,6 +2,22 @@ import pandas as pd
 import numpy as np
 
 
+class _Stage:
+    """No-op stage marker; profiling.install() swaps in a timed one."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _Stage()
+
+
+def stage(name: str):
+    return _NO_STAGE
+
+
 def compute_anchor_scores(df_anchor: pd.DataFrame, lookback: int = 2) -> pd.DataFrame:
     for coin in ['BTC', 'ETH']:
         close_col = f'close_{coin}'
@@ -29,56 +45,63 @@ def evaluate_trade_conditions(row, vol_threshold: float) -> str:
     return 'HOLD'
 
 
-def generate_signals(candles_target: pd.DataFrame, candles_anchor: pd.DataFrame) -> pd.DataFrame:
+def generate_signals(candles_target: pd.DataFrame, candles_anchor: pd.DataFrame,
+                     tp_mult: float = 2.5, sl_mult: float = 1.2,
+                     max_hold: int = 18, lookback: int = 2, preview: bool = False) -> pd.DataFrame:
     """
     Strategy v2.6A – Lagged Anchor Entry (1H) with Position Sizing
+    - ATR-scaled take-profit/stop-loss and max hold are keyword arguments
+    - preview=True prints the last 20 rows of scores and signals
     """
     try:
-        df = candles_target.copy()
-        df['atr'] = (df['high'] - df['low']).rolling(14).mean()
-        df['ltc_return'] = df['close'].pct_change(3)
-        df['ltc_vol'] = df['close'].rolling(14).std()
-        vol_threshold = df['ltc_vol'].quantile(0.85)
-
-        df_anchor = compute_anchor_scores(candles_anchor.copy(), lookback=2)
-        df = df.merge(df_anchor, on="timestamp", how="inner")
-        df['signal'] = 'HOLD'
-        df['position_size'] = 1.0  # Default full position
-
-        TP_MULT = 2.5
-        SL_MULT = 1.2
+        with stage("strategy.features"):
+            df = candles_target.copy()
+            df['atr'] = (df['high'] - df['low']).rolling(14).mean()
+            df['ltc_return'] = df['close'].pct_change(3)
+            df['ltc_vol'] = df['close'].rolling(14).std()
+            vol_threshold = df['ltc_vol'].quantile(0.85)
+
+        with stage("strategy.anchor_scores"):
+            df_anchor = compute_anchor_scores(candles_anchor.copy(), lookback=lookback)
+
+        with stage("strategy.merge"):
+            df = df.merge(df_anchor, on="timestamp", how="inner")
+            df['signal'] = 'HOLD'
+            df['position_size'] = 1.0  # Default full position
+
         holding = 0
         entry_price = None
         last_signal = "HOLD"
-        max_hold = 18
-
-        for i in range(len(df)):
-            price_now = df.at[i, 'close']
-            atr_now = df.at[i, 'atr']
-
-            if holding > 0:
-                holding += 1
-                change = price_now / entry_price - 1
-                if (change >= TP_MULT * atr_now / entry_price) or (change <= -SL_MULT * atr_now / entry_price) or holding >= max_hold:
-                    df.at[i, 'signal'] = 'SELL' if last_signal == 'BUY' else 'BUY'
-                    holding = 0
-                    last_signal = 'HOLD'
-                    continue
+
+        with stage("strategy.signal_loop"):
+            for i in range(len(df)):
+                price_now = df.at[i, 'close']
+                atr_now = df.at[i, 'atr']
+
+                if holding > 0:
+                    holding += 1
+                    change = price_now / entry_price - 1
+                    if (change >= tp_mult * atr_now / entry_price) or (change <= -sl_mult * atr_now / entry_price) or holding >= max_hold:
+                        df.at[i, 'signal'] = 'SELL' if last_signal == 'BUY' else 'BUY'
+                        holding = 0
+                        last_signal = 'HOLD'
+                        continue
+                    else:
+                        df.at[i, 'signal'] = 'HOLD'
                 else:
-                    df.at[i, 'signal'] = 'HOLD'
-            else:
-                action = evaluate_trade_conditions(df.iloc[i], vol_threshold)
-                if action != 'HOLD':
-                    df.at[i, 'signal'] = action
-                    entry_price = price_now
-                    last_signal = action
-                    holding = 1
-                    # Position size scaled by average score magnitude
-                    score_mag = max(abs(df.at[i, 'score_BTC']), abs(df.at[i, 'score_ETH']))
-                    df.at[i, 'position_size'] = min(1.0, max(0.25, score_mag / 0.01))
-
-        print("\n🔍 Preview – Anchor Scores & Volatility")
-        print(df[['timestamp', 'score_BTC', 'score_ETH', 'ltc_return', 'ltc_vol', 'signal', 'position_size']].tail(20))
+                    action = evaluate_trade_conditions(df.iloc[i], vol_threshold)
+                    if action != 'HOLD':
+                        df.at[i, 'signal'] = action
+                        entry_price = price_now
+                        last_signal = action
+                        holding = 1
+                        # Position size scaled by average score magnitude
+                        score_mag = max(abs(df.at[i, 'score_BTC']), abs(df.at[i, 'score_ETH']))
+                        df.at[i, 'position_size'] = min(1.0, max(0.25, score_mag / 0.01))
+
+        if preview:
+            print("\n🔍 Preview – Anchor Scores & Volatility")
+            print(df[['timestamp', 'score_BTC', 'score_ETH', 'ltc_return', 'ltc_vol', 'signal', 'position_size']].tail(20))
 
         return df[['timestamp', 'signal', 'position_size']]
 
@@ -2,13 +2,17 @@ import pandas as pd
 import numpy as np
 
 
-def generate_signals(candles_target: pd.DataFrame, candles_anchor: pd.DataFrame) -> pd.DataFrame:
+def generate_signals(candles_target: pd.DataFrame, candles_anchor: pd.DataFrame,
+                     anchor_move: float = 0.01, lag_band: float = 0.002,
+                     take_profit: float = 0.05, stop_loss: float = 0.03,
+                     max_hold: int = 6) -> pd.DataFrame:
     """
     Lagged Anchor Alpha v1.2: Restore & Cap
     - Original lagged anchor trigger logic
     - Fixed take-profit (+5%) and stop-loss (-3%)
     - Max hold 6 bars
     - No volatility filter
+    - Thresholds are keyword arguments so they can be swept
     """
     try:
         candles_target = candles_target.rename(columns={"close": "close_LTC"})
@@ -19,17 +23,16 @@ def generate_signals(candles_target: pd.DataFrame, candles_anchor: pd.DataFrame)
         df["ret_eth"] = df["close_ETH"].pct_change()
         df["ret_ltc"] = df["close_LTC"].pct_change()
 
-        df["anchor_pump"] = (df["ret_btc"].shift(1) > 0.01) | (df["ret_eth"].shift(1) > 0.01)
-        df["anchor_dump"] = (df["ret_btc"].shift(1) < -0.01) | (df["ret_eth"].shift(1) < -0.01)
+        df["anchor_pump"] = (df["ret_btc"].shift(1) > anchor_move) | (df["ret_eth"].shift(1) > anchor_move)
+        df["anchor_dump"] = (df["ret_btc"].shift(1) < -anchor_move) | (df["ret_eth"].shift(1) < -anchor_move)
 
-        df["lagged_pump"] = df["anchor_pump"] & (df["ret_ltc"].shift(1) < 0.002)
-        df["lagged_dump"] = df["anchor_dump"] & (df["ret_ltc"].shift(1) > -0.002)
+        df["lagged_pump"] = df["anchor_pump"] & (df["ret_ltc"].shift(1) < lag_band)
+        df["lagged_dump"] = df["anchor_dump"] & (df["ret_ltc"].shift(1) > -lag_band)
 
         df["signal"] = "HOLD"
         holding = 0
         last_signal = "HOLD"
         entry_price = None
-        MAX_HOLD = 6
 
         for i in range(len(df)):
             price_now = df.at[i, "close_LTC"]
@@ -38,18 +41,18 @@ def generate_signals(candles_target: pd.DataFrame, candles_anchor: pd.DataFrame)
                 holding += 1
                 change = price_now / entry_price - 1
 
-                if last_signal == "BUY" and (change >= 0.05 or change <= -0.03):
+                if last_signal == "BUY" and (change >= take_profit or change <= -stop_loss):
                     df.at[i, "signal"] = "SELL"
                     holding = 0
                     last_signal = "HOLD"
                     continue
-                elif last_signal == "SELL" and (-change >= 0.05 or -change <= -0.03):
+                elif last_signal == "SELL" and (-change >= take_profit or -change <= -stop_loss):
                     df.at[i, "signal"] = "BUY"
                     holding = 0
                     last_signal = "HOLD"
                     continue
 
-                if holding >= MAX_HOLD:
+                if holding >= max_hold:
                     df.at[i, "signal"] = "SELL" if last_signal == "BUY" else "BUY"
                     holding = 0
                     last_signal = "HOLD"
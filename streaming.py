@@ -0,0 +1,357 @@
+import abc
+import importlib
+import math
+
+import pandas as pd
+
+from indicators import ATR, NAN, PctChange, RollingMean, RollingStd, ZScore
+
+
+def _div(a, b):
+    # Float division with NumPy semantics (inf/NaN instead of ZeroDivisionError)
+    if b == 0:
+        return NAN if a == 0 or math.isnan(a) else math.copysign(math.inf, a)
+    return a / b
+
+
+def _gt(a, b):
+    # NaN compares False, like the pandas/NumPy comparisons in the batch code
+    return a > b
+
+
+class StreamingStrategy(abc.ABC):
+    """
+    Incremental counterpart of a generate_signals implementation.
+
+    init(candles_target, candles_anchor) resets the state and replays the
+    history; on_bar(target_bar, anchor_bar) then consumes one aligned bar at
+    a time in O(1) and returns 'BUY'/'SELL'/'HOLD' (or None for a bar the
+    batch strategy drops from its output). Bars are mappings with the same
+    column names generate_signals receives.
+    """
+
+    @abc.abstractmethod
+    def reset(self):
+        """Clears all per-bar state."""
+
+    @abc.abstractmethod
+    def on_bar(self, target_bar, anchor_bar):
+        """Consumes one bar and returns its signal (or None)."""
+
+    def init(self, candles_target, candles_anchor):
+        self.reset()
+        timestamps, signals = [], []
+        for target_bar, anchor_bar in iter_bars(candles_target, candles_anchor):
+            signal = self.on_bar(target_bar, anchor_bar)
+            if signal is not None:
+                timestamps.append(target_bar["timestamp"])
+                signals.append(signal)
+        return pd.DataFrame({"timestamp": timestamps, "signal": signals})
+
+
+def iter_bars(candles_target, candles_anchor):
+    """Yields (target_bar, anchor_bar) dicts aligned on timestamp like the batch merge."""
+    df = candles_target.merge(candles_anchor, on="timestamp", how="inner")
+    target_cols = list(candles_target.columns)
+    anchor_cols = ["timestamp"] + [c for c in candles_anchor.columns if c != "timestamp"]
+    for row in df.to_dict("records"):
+        yield {c: row[c] for c in target_cols}, {c: row[c] for c in anchor_cols}
+
+
+class LaggedAnchorStream(StreamingStrategy):
+    """strategy1.py (and strategy2.py with filtered=True) as a per-bar state machine."""
+
+    def __init__(self, filtered=False, anchor_move=0.01, lag_band=0.002,
+                 take_profit=0.05, stop_loss=0.03, max_hold=6):
+        self.filtered = filtered
+        self.anchor_move = anchor_move
+        self.lag_band = lag_band
+        self.take_profit = take_profit
+        self.stop_loss = stop_loss
+        self.max_hold = max_hold
+        self.reset()
+
+    def reset(self):
+        self.returns = {"BTC": PctChange(1), "ETH": PctChange(1), "LTC": PctChange(1)}
+        self.prev_ret = {"BTC": NAN, "ETH": NAN, "LTC": NAN}
+        self.prev_close = NAN
+        self.vol_avg = RollingMean(6)
+        self.ltc_trend = RollingMean(4)
+        self.holding = 0
+        self.last_signal = "HOLD"
+        self.entry_price = None
+
+    def on_bar(self, target_bar, anchor_bar):
+        price_now = target_bar["close"]
+        ret = {
+            "BTC": self.returns["BTC"].update(anchor_bar["close_BTC"]),
+            "ETH": self.returns["ETH"].update(anchor_bar["close_ETH"]),
+            "LTC": self.returns["LTC"].update(price_now),
+        }
+        prev = self.prev_ret
+        self.prev_ret = ret
+
+        # The filters use windows that end on the previous bar (rolling(...).shift(1))
+        vol_avg = self.vol_avg.value
+        ltc_trend = self.ltc_trend.value
+        self.vol_avg.update(_div(target_bar["high"] - target_bar["low"], self.prev_close))
+        self.ltc_trend.update(ret["LTC"])
+        self.prev_close = price_now
+
+        m = self.anchor_move
+        lagged_pump = (_gt(prev["BTC"], m) or _gt(prev["ETH"], m)) and _gt(self.lag_band, prev["LTC"])
+        lagged_dump = (_gt(-m, prev["BTC"]) or _gt(-m, prev["ETH"])) and _gt(prev["LTC"], -self.lag_band)
+
+        if self.holding > 0:
+            self.holding += 1
+            change = price_now / self.entry_price - 1
+            if self.last_signal == "BUY" and (change >= self.take_profit or change <= -self.stop_loss):
+                return self._close("SELL")
+            if self.last_signal == "SELL" and (-change >= self.take_profit or -change <= -self.stop_loss):
+                return self._close("BUY")
+            if self.holding >= self.max_hold:
+                return self._close("SELL" if self.last_signal == "BUY" else "BUY")
+            return "HOLD"
+
+        if self.filtered and (_gt(vol_avg, 0.03) or _gt(0.002, abs(ltc_trend))):
+            return "HOLD"
+        if lagged_pump or lagged_dump:
+            self.last_signal = "BUY" if lagged_pump else "SELL"
+            self.entry_price = price_now
+            self.holding = 1
+            return self.last_signal
+        return "HOLD"
+
+    def _close(self, signal):
+        self.holding = 0
+        self.last_signal = "HOLD"
+        return signal
+
+
+class _TrailingStopStream(StreamingStrategy):
+    """Shared ATR / momentum / trailing-stop state for strategy3–6."""
+
+    start_bar = 4
+
+    def reset(self):
+        self.bar = 0
+        self.atr = ATR(14)
+        self.prev_close = NAN
+        self.prev_high = NAN
+        self.in_position = False
+        self.entry_price = 0
+        self.trail_stop = 0
+
+    def _update_common(self, target_bar):
+        atr = self.atr.update(target_bar["high"], target_bar["low"])
+        close = target_bar["close"]
+        price_break = _gt(close, self.prev_high)
+        volatility_ratio = _div(atr, self.prev_close)
+        if not math.isnan(volatility_ratio):
+            volatility_ratio = min(max(volatility_ratio, 0.005), 0.04)
+        self.prev_high = target_bar["high"]
+        self.prev_close = close
+        return close, atr, price_break, volatility_ratio
+
+    def _enter(self, close, stop):
+        self.entry_price = close
+        self.trail_stop = stop
+        self.in_position = True
+        return "BUY"
+
+
+class BreakoutMomentumStream(_TrailingStopStream):
+    """strategy3.py: anchor momentum + LTC breakout, ATR trailing stop, 4% target."""
+
+    window = (pd.Timestamp("2025-01-01"), pd.Timestamp("2025-05-09"))
+
+    def reset(self):
+        super().reset()
+        self.btc_mom = PctChange(4)
+        self.eth_mom = PctChange(4)
+
+    def on_bar(self, target_bar, anchor_bar):
+        ts = pd.Timestamp(target_bar["timestamp"])
+        if not self.window[0] <= ts <= self.window[1]:
+            return None
+
+        close, atr, ltc_break, _ = self._update_common(target_bar)
+        btc_mom = self.btc_mom.update(anchor_bar["close_BTC"])
+        eth_mom = self.eth_mom.update(anchor_bar["close_ETH"])
+        self.bar += 1
+        if self.bar <= self.start_bar:
+            return "HOLD"
+
+        if not self.in_position:
+            if _gt(btc_mom, 0.005) and _gt(eth_mom, 0.004) and ltc_break and _gt(0.02 * close, atr):
+                return self._enter(close, close - 2 * atr)
+            return "HOLD"
+
+        self.trail_stop = max(self.trail_stop, close - 1.5 * atr)
+        if close < self.trail_stop or close / self.entry_price >= 1.04:
+            self.in_position = False
+            return "SELL"
+        return "HOLD"
+
+
+class AdaptiveMomentumStream(_TrailingStopStream):
+    """strategy4.py: 200-bar regime filter, volume z-score entries, 1.2 ATR trail."""
+
+    start_bar = 2
+
+    def reset(self):
+        super().reset()
+        self.ma_200 = RollingMean(200)
+        self.volume_z = ZScore(50)
+        self.btc_mom = PctChange(4)
+        self.eth_mom = PctChange(4)
+
+    def on_bar(self, target_bar, anchor_bar):
+        close, atr, price_confirm, current_vol = self._update_common(target_bar)
+        ma_200 = self.ma_200.update(close)
+        volume_z = self.volume_z.update(target_bar["volume"])
+        btc_mom = self.btc_mom.update(anchor_bar["close_BTC"])
+        eth_mom = self.eth_mom.update(anchor_bar["close_ETH"])
+        self.bar += 1
+        if self.bar <= self.start_bar or _gt(ma_200, close):
+            return "HOLD"
+
+        if not self.in_position:
+            if (_gt(btc_mom, 0.005) and _gt(eth_mom, 0.004) and price_confirm
+                    and _gt(0.02, current_vol) and _gt(volume_z, 0.5)):
+                return self._enter(close, close - atr * 1.5)
+            return "HOLD"
+
+        signal = "HOLD"
+        unrealized_pct = (close / self.entry_price - 1) * 100
+        self.trail_stop = max(self.trail_stop, close - atr * 1.2)
+        if unrealized_pct >= 3.0 or close < self.trail_stop:
+            signal = "SELL"
+        if _gt(current_vol, 0.03):
+            signal = "SELL"
+        self.in_position = signal != "SELL"
+        return signal
+
+
+class MultiTimeframeStream(_TrailingStopStream):
+    """
+    strategy5.py / strategy6.py: smoothed 4-bar and 24-bar anchor momentum,
+    volume spikes and tiered trailing stops. The two files differ only in the
+    volatility measure and thresholds, which are constructor arguments.
+    """
+
+    def __init__(self, volatility="atr_ratio", mom_4h=(0.006, 0.005), mom_1d=0.01, volume_mult=1.3,
+                 initial_stop=2.0, tiers=((2, 1.8), (4, 1.5)), target_pct=6, vol_ok=0.025, vol_exit=0.035):
+        self.volatility = volatility
+        self.mom_4h = mom_4h
+        self.mom_1d = mom_1d
+        self.volume_mult = volume_mult
+        self.initial_stop = initial_stop
+        self.tiers = tiers
+        self.target_pct = target_pct
+        self.vol_ok = vol_ok
+        self.vol_exit = vol_exit
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self.volume_ma = RollingMean(50)
+        self.ret = PctChange(1)
+        self.ret_std = RollingStd(24)
+        self.mom = {}
+        for coin in ["BTC", "ETH"]:
+            self.mom[coin] = (PctChange(4), RollingMean(8), PctChange(24), RollingMean(24))
+
+    def _momentum(self, coin, close):
+        pct_4, mean_4, pct_24, mean_24 = self.mom[coin]
+        return mean_4.update(pct_4.update(close)), mean_24.update(pct_24.update(close))
+
+    def on_bar(self, target_bar, anchor_bar):
+        close, atr, price_break, volatility_ratio = self._update_common(target_bar)
+        ret_std = self.ret_std.update(self.ret.update(close))
+        current_vol = volatility_ratio if self.volatility == "atr_ratio" else ret_std
+        volume_spike = _gt(target_bar["volume"], self.volume_ma.update(target_bar["volume"]) * self.volume_mult)
+        btc_4h, btc_1d = self._momentum("BTC", anchor_bar["close_BTC"])
+        eth_4h, _ = self._momentum("ETH", anchor_bar["close_ETH"])
+        self.bar += 1
+        if self.bar <= self.start_bar:
+            return "HOLD"
+
+        if not self.in_position:
+            if (_gt(btc_4h, self.mom_4h[0]) and _gt(eth_4h, self.mom_4h[1]) and _gt(btc_1d, self.mom_1d)
+                    and price_break and _gt(self.vol_ok, current_vol) and volume_spike):
+                return self._enter(close, close - atr * self.initial_stop)
+            return "HOLD"
+
+        signal = "HOLD"
+        unrealized_pct = (close / self.entry_price - 1) * 100
+        for threshold, mult in self.tiers:
+            if unrealized_pct > threshold:
+                self.trail_stop = max(self.trail_stop, close - atr * mult)
+        if close < self.trail_stop or unrealized_pct >= self.target_pct:
+            signal = "SELL"
+        if _gt(current_vol, self.vol_exit):
+            signal = "SELL"
+        self.in_position = signal != "SELL"
+        return signal
+
+
+# strategy.py has no stream: its vol_threshold is a quantile over the whole series
+STREAMS = {
+    "strategy1": LaggedAnchorStream,
+    "strategy2": lambda: LaggedAnchorStream(filtered=True),
+    "strategy3": BreakoutMomentumStream,
+    "strategy4": AdaptiveMomentumStream,
+    "strategy5": MultiTimeframeStream,
+    "strategy6": lambda: MultiTimeframeStream(
+        volatility="ret_std", mom_4h=(0.008, 0.006), mom_1d=0.015, volume_mult=1.5,
+        initial_stop=1.8, tiers=((3, 1.5), (6, 1.2)), target_pct=8),
+}
+
+
+def replay(stream, candles_target, candles_anchor, warmup=0):
+    """
+    Feeds history through a stream: init() on the first `warmup` bars, then
+    on_bar() for each remaining bar. Returns the same layout as generate_signals.
+    """
+    history = candles_target.iloc[:warmup]
+    out = [stream.init(history, candles_anchor)]
+    live = candles_target.iloc[warmup:]
+    timestamps, signals = [], []
+    for target_bar, anchor_bar in iter_bars(live, candles_anchor):
+        signal = stream.on_bar(target_bar, anchor_bar)
+        if signal is not None:
+            timestamps.append(target_bar["timestamp"])
+            signals.append(signal)
+    out.append(pd.DataFrame({"timestamp": timestamps, "signal": signals}))
+    return pd.concat(out, ignore_index=True)
+
+
+def check_replay(strategy_name, candles_target, candles_anchor, warmup=0):
+    """
+    Compares replayed on_bar output with the batch generate_signals output.
+
+    Returns:
+    - DataFrame of mismatching rows (empty when the stream is exact)
+    """
+    batch = importlib.import_module(strategy_name).generate_signals(candles_target, candles_anchor)
+    streamed = replay(STREAMS[strategy_name](), candles_target, candles_anchor, warmup)
+
+    if len(batch) != len(streamed):
+        raise ValueError(f"❌ {strategy_name}: {len(streamed)} streamed rows vs {len(batch)} batch rows")
+
+    mismatch = batch["signal"].to_numpy() != streamed["signal"].to_numpy()
+    diff = batch.loc[mismatch, ["timestamp", "signal"]].assign(streamed=streamed["signal"][mismatch])
+    if diff.empty:
+        print(f"✅ {strategy_name}: on_bar replay matches generate_signals on {len(batch)} bars")
+    else:
+        print(f"❌ {strategy_name}: {len(diff)} bars differ, first at {diff['timestamp'].iloc[0]}")
+    return diff
+
+
+if __name__ == "__main__":
+    from data_cache import load_candles
+
+    candles_target, candles_anchor = load_candles()
+    for name in STREAMS:
+        check_replay(name, candles_target, candles_anchor, warmup=len(candles_target) // 2)
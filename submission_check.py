@@ -1,14 +1,36 @@
 import pandas as pd
+import numpy as np
+import contextlib
+import glob
 import importlib.util
+import io
+import multiprocessing
 import os
+import sys
+import time
+
+from benchmark import peak_memory_mb, synthetic_candles
+from screener import average_daily_usd_volume
+from signals import invalid_signals
 
 ALLOWED_SIGNALS = {"BUY", "SELL", "HOLD"}
 ALLOWED_IMPORTS = {"pandas", "numpy"}
 MIN_AVG_VOLUME_USD = 5_000_000  # $5M threshold
 
+# Performance budget: the largest size must finish within these limits
+PERF_SIZES = (1_000, 3_000, 10_000)    # bars; 3,000 is about the official 1H window
+MAX_SIGNAL_SECONDS = 30.0
+MAX_PEAK_MEMORY_MB = 1024.0
+MAX_SCALING_EXPONENT = 1.3             # time ~ bars**k; k above this is flagged
+
+# Batch mode: each candidate runs in its own process with these limits
+BATCH_PATTERN = "strategy*.py"
+BATCH_TIMEOUT_SECONDS = 300.0
+BATCH_MEMORY_LIMIT_MB = 4096
+
 def load_strategy(path='strategy.py'):
     if not os.path.exists(path):
-        raise FileNotFoundError("❌ strategy.py not found.")
+        raise FileNotFoundError(f"❌ {path} not found.")
 
     spec = importlib.util.spec_from_file_location("strategy", path)
     strategy = importlib.util.module_from_spec(spec)
@@ -27,7 +49,7 @@ def validate_imports(path='strategy.py'):
                     raise ImportError(f"❌ External library '{lib}' is not allowed. Only 'pandas' and 'numpy' are permitted.")
 
 def generate_dummy_ohlcv(symbol, timeframe="1H", rows=30):
-    ts = pd.date_range("2025-01-01", periods=rows, freq=timeframe)
+    ts = pd.date_range("2025-01-01", periods=rows, freq=timeframe.lower())
     df = pd.DataFrame({
         "timestamp": ts,
         "open": 1.0,
@@ -38,12 +60,73 @@ def generate_dummy_ohlcv(symbol, timeframe="1H", rows=30):
     })
     return df
 
-def run_check():
-    print("🔍 Running submission checks...")
+def check_performance(strategy, target_symbol, anchor_symbols, sizes=PERF_SIZES,
+                      max_seconds=MAX_SIGNAL_SECONDS, max_memory_mb=MAX_PEAK_MEMORY_MB,
+                      max_exponent=MAX_SCALING_EXPONENT):
+    """
+    Runs generate_signals on synthetic data of increasing size.
+
+    Every anchor gets full OHLCV columns. Sizes run smallest first, and a
+    size is skipped (and the check fails) when the scaling measured so far
+    predicts it would blow the wall-time budget. Peak memory is measured
+    under tracemalloc on the largest size that ran.
+
+    Returns:
+    - DataFrame with bars, seconds and bars/second per size
+    """
+    rows = []
+    for n_bars in sorted(sizes):
+        if len(rows) >= 2:
+            k = np.polyfit(np.log([r["bars"] for r in rows]), np.log([r["seconds"] for r in rows]), 1)[0]
+        else:
+            k = 1.0
+        if rows and rows[-1]["seconds"] * (n_bars / rows[-1]["bars"]) ** max(k, 1.0) > max_seconds:
+            raise TimeoutError(f"❌ generate_signals would take over {max_seconds:.0f}s on {n_bars:,} bars "
+                               f"(measured {rows[-1]['seconds']:.2f}s on {rows[-1]['bars']:,}, time ~ bars^{k:.2f})")
+
+        candles_target, candles_anchor = synthetic_candles(n_bars, target_symbol, anchor_symbols)
+        start = time.perf_counter()
+        signals = strategy.generate_signals(candles_target, candles_anchor)
+        seconds = time.perf_counter() - start
+        if len(signals) != n_bars:
+            raise ValueError(f"❌ Output length mismatch on {n_bars:,} synthetic bars: got {len(signals):,}")
+        rows.append({"bars": n_bars, "seconds": seconds, "bars_per_s": n_bars / max(seconds, 1e-9)})
+
+    results = pd.DataFrame(rows)
+    for r in rows:
+        print(f"⏱️ {r['bars']:>7,} bars: {r['seconds']:.3f}s ({r['bars_per_s']:,.0f} bars/s)")
+
+    largest = rows[-1]
+    if largest["seconds"] > max_seconds:
+        raise TimeoutError(f"❌ generate_signals took {largest['seconds']:.1f}s on {largest['bars']:,} bars "
+                           f"(budget {max_seconds:.0f}s)")
+
+    # The timing comes from the loop above; one extra run on the same candles measures memory
+    peak_mb = peak_memory_mb(strategy.generate_signals, candles_target, candles_anchor)
+    results.attrs["peak_memory_mb"] = peak_mb
+    if peak_mb > max_memory_mb:
+        raise MemoryError(f"❌ generate_signals peaked at {peak_mb:,.0f} MB on {largest['bars']:,} bars "
+                          f"(budget {max_memory_mb:,.0f} MB)")
+    print(f"✅ Peak memory {peak_mb:,.1f} MB on {largest['bars']:,} bars (budget {max_memory_mb:,.0f} MB)")
+
+    if len(rows) >= 2:
+        k = np.polyfit(np.log(results["bars"]), np.log(results["seconds"]), 1)[0]
+        results.attrs["scaling_exponent"] = k
+        if k > max_exponent:
+            print(f"⚠️ Run time grows super-linearly (time ~ bars^{k:.2f}); check for quadratic loops")
+        else:
+            print(f"✅ Run time scales as bars^{k:.2f}")
+    return results
+
+
+def run_check(path='strategy.py', perf_sizes=PERF_SIZES, max_seconds=MAX_SIGNAL_SECONDS,
+              max_memory_mb=MAX_PEAK_MEMORY_MB):
+    """Validates one strategy file; returns True if every check passed."""
+    print(f"🔍 Running submission checks on {path}...")
 
     try:
-        strategy = load_strategy()
-        validate_imports()
+        strategy = load_strategy(path)
+        validate_imports(path)
 
         if not hasattr(strategy, "generate_signals"):
             raise AttributeError("❌ Missing required function: generate_signals()")
@@ -69,11 +152,16 @@ def run_check():
         candles_anchor = pd.DataFrame({'timestamp': candles_target['timestamp']})
         for anchor in metadata["anchors"]:
             symbol = anchor['symbol']
-            candles_anchor[f"close_{symbol}"] = candles_target['close']
+            for col in ["open", "high", "low", "close", "volume"]:
+                candles_anchor[f"{col}_{symbol}"] = candles_target[col]
 
         # 💰 Volume check
-        candles_target["usd_volume"] = candles_target["volume"] * candles_target["close"]
-        avg_usd_vol = candles_target["usd_volume"].mean()
+        # Summed per UTC day and averaged over the days the candles span (not a mean of bars)
+        ts = candles_target["timestamp"]
+        avg_usd_vol = average_daily_usd_volume(
+            ts, candles_target["close"], candles_target["volume"],
+            start=ts.iloc[0].floor("D"), end=ts.iloc[-1].floor("D") + pd.Timedelta(days=1),
+        )
         if avg_usd_vol < MIN_AVG_VOLUME_USD:
             print(f"❌ Avg daily USD volume = ${avg_usd_vol:,.2f} — must be ≥ $5,000,000.")
         else:
@@ -90,15 +178,114 @@ def run_check():
         if len(signals) != len(candles_target):
             raise ValueError("❌ Output length mismatch: signals must match length of candles_target")
 
-        invalid = [s for s in signals['signal'] if s not in ALLOWED_SIGNALS]
+        invalid = invalid_signals(signals['signal'], ALLOWED_SIGNALS)
         if invalid:
-            raise ValueError(f"❌ Invalid signal values found: {set(invalid)}")
+            raise ValueError(f"❌ Invalid signal values found: {invalid}")
 
         print("✅ Signals are correctly formatted and aligned.")
+
+        # ⏱️ Performance budget on realistic-size data
+        if perf_sizes:
+            check_performance(strategy, target["symbol"], [a["symbol"] for a in metadata["anchors"]],
+                              perf_sizes, max_seconds, max_memory_mb)
         print("✅ All checks passed! Submission is valid. 🎉")
+        return True
 
     except Exception as e:
         print(str(e))
+        return False
+
+def _check_worker(path, conn, memory_limit_mb, check_kwargs):
+    # Cap the address space so a runaway strategy fails with MemoryError instead of taking the host down
+    if memory_limit_mb:
+        try:
+            import resource
+            limit = int(memory_limit_mb * 2**20)
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError):
+            pass
+
+    output = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output):
+            passed = run_check(path, **check_kwargs)
+    except BaseException as e:
+        passed = False
+        output.write(f"❌ {type(e).__name__}: {e}\n")
+    conn.send((passed, time.perf_counter() - start, output.getvalue()))
+    conn.close()
+
+def _failure_reason(output):
+    lines = [line for line in output.splitlines() if line.strip()]
+    failures = [line for line in lines if line.startswith("❌")]
+    return (failures or lines or [""])[-1]
+
+def batch_check(paths=None, pattern=BATCH_PATTERN, processes=None, timeout=BATCH_TIMEOUT_SECONDS,
+                memory_limit_mb=BATCH_MEMORY_LIMIT_MB, **check_kwargs):
+    """
+    Validates many strategy files in parallel, one isolated process each.
+
+    A worker that exceeds `timeout` seconds is killed and reported as
+    TIMEOUT; one that dies (e.g. on the memory limit) is reported as CRASH.
+    Either way the rest of the batch carries on.
+
+    Parameters:
+    - paths: files to check (default: files matching `pattern`)
+    - processes: concurrent workers (default: os.cpu_count())
+    - timeout: wall-time limit per file in seconds
+    - memory_limit_mb: address-space limit per worker (None to disable)
+    - check_kwargs: passed to run_check (perf_sizes, max_seconds, max_memory_mb)
+
+    Returns:
+    - DataFrame with file, status, seconds and the failure reason, one row per file
+    """
+    paths = sorted(paths if paths is not None else glob.glob(pattern))
+    processes = processes or os.cpu_count() or 1
+    ctx = multiprocessing.get_context("spawn")
+    pending, running, rows = list(paths), {}, {}
+
+    print(f"🔍 Checking {len(paths)} strategy files on {processes} workers...")
+    while pending or running:
+        while pending and len(running) < processes:
+            path = pending.pop(0)
+            parent, child = ctx.Pipe(duplex=False)
+            proc = ctx.Process(target=_check_worker, args=(path, child, memory_limit_mb, check_kwargs), daemon=True)
+            proc.start()
+            child.close()
+            running[path] = (proc, parent, time.perf_counter())
+
+        for path, (proc, conn, started) in list(running.items()):
+            elapsed = time.perf_counter() - started
+            if conn.poll():
+                try:
+                    passed, seconds, output = conn.recv()
+                    rows[path] = {"status": "PASS" if passed else "FAIL", "seconds": seconds,
+                                  "reason": "" if passed else _failure_reason(output)}
+                except EOFError:
+                    rows[path] = {"status": "CRASH", "seconds": elapsed, "reason": f"exit code {proc.exitcode}"}
+            elif not proc.is_alive():
+                rows[path] = {"status": "CRASH", "seconds": elapsed, "reason": f"exit code {proc.exitcode}"}
+            elif elapsed > timeout:
+                proc.kill()
+                rows[path] = {"status": "TIMEOUT", "seconds": elapsed, "reason": f"❌ exceeded {timeout:.0f}s"}
+            else:
+                continue
+            proc.join()
+            conn.close()
+            del running[path]
+            status = rows[path]["status"]
+            print(f"{'✅' if status == 'PASS' else '❌'} {path}: {status} ({rows[path]['seconds']:.1f}s)")
+        time.sleep(0.05)
+
+    table = pd.DataFrame([{"file": p, **rows[p]} for p in paths], columns=["file", "status", "seconds", "reason"])
+    print(f"\n📋 {int((table['status'] == 'PASS').sum())}/{len(table)} files passed")
+    print(table.to_string(index=False))
+    return table
 
 if __name__ == "__main__":
-    run_check()
\ No newline at end of file
+    # python submission_check.py [--all | file.py ...]
+    if len(sys.argv) > 1:
+        batch_check(None if sys.argv[1] == "--all" else sys.argv[1:])
+    else:
+        run_check()
\ No newline at end of file
@@ -0,0 +1,159 @@
+import contextlib
+import importlib
+import io
+import itertools
+import os
+from multiprocessing import Pool
+
+import pandas as pd
+
+from backtest import backtest_signals
+from data_cache import ensure_cache
+from exit_kernel import VECTORIZED
+from feature_cache import FEATURE_CACHE, install as install_feature_cache
+from panel import Panel
+from profiling import PROFILER, install as install_profiler, stage
+
+# Parameter grids for the lagged-anchor strategies; keys are generate_signals kwargs
+DEFAULT_GRIDS = {
+    "strategy": {
+        "tp_mult": [1.5, 2.0, 2.5, 3.0, 3.5],
+        "sl_mult": [0.8, 1.0, 1.2, 1.5],
+        "max_hold": [6, 12, 18, 24],
+        "lookback": [1, 2, 3, 4],
+    },
+    "strategy1": {
+        "anchor_move": [0.005, 0.0075, 0.01, 0.0125, 0.015],
+        "lag_band": [0.001, 0.002, 0.003, 0.005],
+        "take_profit": [0.03, 0.04, 0.05, 0.06, 0.08],
+        "stop_loss": [0.02, 0.03, 0.04, 0.05],
+        "max_hold": [4, 6, 8, 12, 24],
+    },
+}
+DEFAULT_GRIDS["strategy2"] = DEFAULT_GRIDS["strategy1"]
+
+WORKER = {}
+
+
+def param_grid(grid):
+    """Expands {'name': [values, ...]} into a list of parameter dicts."""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def init_worker(strategy_name, target, anchors, timeframe, data_dir, fee, vectorized, engine, profile=False):
+    """
+    Pool initializer shared by the sweep and walk-forward workers.
+
+    Each worker maps the cached data once and keeps the candles, the
+    strategy's generate_signals and the backtest settings in WORKER for
+    every task it runs. With profile=True the worker's PROFILER records
+    the stages of the strategy, the exit kernel and the backtest.
+    """
+    panel = Panel.from_cache(target, anchors, timeframe, data_dir)
+    candles_target, candles_anchor = panel.target_frame(), panel.anchor_frame()
+    strategy = importlib.import_module(strategy_name)
+    # Anchor features only depend on the anchor data and their own params
+    install_feature_cache(strategy)
+    if profile:
+        install_profiler(strategy)
+        PROFILER.enable()
+    WORKER.update(
+        generate_signals=VECTORIZED[strategy_name] if vectorized else strategy.generate_signals,
+        candles_target=candles_target,
+        candles_anchor=candles_anchor,
+        fee=fee,
+        engine=engine,
+    )
+
+
+def _evaluate(params):
+    # Stats are per task, so the parent can merge every row's snapshot
+    PROFILER.reset()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()), stage("sweep.generate_signals"):
+            signals = WORKER["generate_signals"](WORKER["candles_target"], WORKER["candles_anchor"], **params)
+        _, metrics = backtest_signals(signals, WORKER["candles_target"], fee=WORKER["fee"], engine=WORKER["engine"])
+        row = {**params, **metrics, "error": None}
+    except Exception as e:
+        row = {**params, "error": str(e)}
+    # Each worker's running cache totals; run_sweep keeps the last one per worker
+    row["_cache"] = (os.getpid(), FEATURE_CACHE.stats())
+    if PROFILER.enabled:
+        row["_profile"] = PROFILER.snapshot()
+    return row
+
+
+def _cache_totals(rows):
+    last = dict(row.pop("_cache") for row in rows)
+    return {k: sum(stats[k] for stats in last.values()) for k in ("hits", "disk_hits", "misses")}, len(last)
+
+
+def run_sweep(strategy_name="strategy1", grid=None, target="LTC", anchors=("BTC", "ETH"),
+              timeframe="1H", data_dir="data", fee=0.001, processes=None,
+              rank_by="sharpe_ratio", output_path="sweep_results.csv", vectorized=True, engine="vectorized",
+              profile=False):
+    """
+    Evaluates a parameter grid for one strategy across a process pool.
+
+    Parameters:
+    - strategy_name: module name, e.g. 'strategy1'
+    - grid: dict of generate_signals kwarg -> list of values (default: DEFAULT_GRIDS)
+    - processes: worker count (default: os.cpu_count())
+    - rank_by: metric column used to rank results, best first
+    - output_path: CSV written with the ranked table (None to skip)
+    - vectorized: use the exit-kernel version of the strategy (identical
+      signals, no per-bar loop) instead of its generate_signals
+    - engine: backtest_signals engine ('position' scores SELL entries as shorts)
+    - profile: time the strategy, exit-kernel and backtest stages in every
+      worker and print the merged stage profile
+
+    Returns:
+    - DataFrame of parameters and metrics, ranked by rank_by (with
+      profile=True, the stage profile is in .attrs['profile'])
+    """
+    points = param_grid(grid if grid is not None else DEFAULT_GRIDS[strategy_name])
+    processes = processes or os.cpu_count() or 1
+    chunksize = max(1, len(points) // (processes * 8))
+
+    # Build any missing cache entries once here instead of racing in every worker
+    for symbol in (target, *anchors):
+        ensure_cache(symbol, timeframe, data_dir)
+
+    print(f"\n🧮 Sweeping {strategy_name}: {len(points)} points on {processes} workers...")
+    with Pool(processes, initializer=init_worker,
+              initargs=(strategy_name, target, anchors, timeframe, data_dir, fee, vectorized, engine,
+                        profile)) as pool:
+        rows = list(pool.imap_unordered(_evaluate, points, chunksize=chunksize))
+
+    totals, workers = _cache_totals(rows)
+    print(f"🧮 Feature cache: {totals['hits']} hits, {totals['misses']} misses across {workers} workers")
+    if profile:
+        PROFILER.reset()
+        for row in rows:
+            PROFILER.merge(row.pop("_profile", {}))
+        report = PROFILER.report()
+        print(f"\n⏱️ Stage profile over {len(rows)} points")
+        print(report.to_string(index=False, float_format=lambda v: f"{v:,.3f}"))
+    results = pd.DataFrame(rows)
+    failed = results["error"].notna().sum()
+    if failed:
+        print(f"⚠️ {failed} points raised errors (see 'error' column)")
+
+    # When every point failed there is no metric column to rank by; keep the errors in grid order
+    if rank_by in results:
+        ascending = rank_by == "max_drawdown_pct"
+        results = results.sort_values(rank_by, ascending=ascending, na_position="last").reset_index(drop=True)
+    results.insert(0, "rank", range(1, len(results) + 1))
+    if profile:
+        results.attrs["profile"] = report
+
+    if output_path:
+        results.to_csv(output_path, index=False)
+        print(f"✅ Results saved to {output_path}")
+    return results
+
+
+if __name__ == "__main__":
+    results = run_sweep("strategy1")
+    print(results.head(20).to_string(index=False))
@@ -0,0 +1,178 @@
+import contextlib
+import io
+import os
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from backtest import backtest_signals, compute_metrics
+from panel import Panel
+from sweep import WORKER, init_worker, param_grid
+
+SCHEMES = ("anchored", "rolling", "kfold")
+METRICS = ["final_return_pct", "sharpe_ratio", "max_drawdown_pct"]
+
+
+def make_folds(n_bars, n_folds=5, scheme="anchored", train_bars=None, purge=0, embargo=0):
+    """
+    Splits bar indices into train/test folds with purge and embargo gaps.
+
+    Schemes:
+    - 'anchored': train always starts at bar 0 and grows; tests tile the
+      bars after the first train window
+    - 'rolling': like 'anchored' but train is the last `train_bars` bars
+    - 'kfold': contiguous test blocks; train is everything else except
+      `purge` bars before and `embargo` bars after each test block
+
+    `purge` bars are dropped between train and test in every scheme, so
+    signals that depend on recent bars cannot straddle the boundary.
+
+    Returns:
+    - list of dicts with 'fold', 'train' (list of (start, end) segments,
+      end exclusive) and 'test' ((start, end))
+    """
+    if scheme not in SCHEMES:
+        raise ValueError(f"Unknown scheme '{scheme}'. Expected one of {SCHEMES}.")
+
+    folds = []
+    if scheme == "kfold":
+        bounds = np.linspace(0, n_bars, n_folds + 1).astype(int)
+        for k in range(n_folds):
+            start, end = int(bounds[k]), int(bounds[k + 1])
+            train = [(0, max(0, start - purge)), (min(n_bars, end + embargo), n_bars)]
+            folds.append({"fold": k, "train": [s for s in train if s[1] > s[0]], "test": (start, end)})
+        return folds
+
+    # Walk-forward: the first block (or train_bars) is train only, then n_folds test blocks
+    first = train_bars if train_bars else n_bars // (n_folds + 1)
+    bounds = np.linspace(first + purge, n_bars, n_folds + 1).astype(int)
+    for k in range(n_folds):
+        start, end = int(bounds[k]), int(bounds[k + 1])
+        train_end = start - purge
+        train_start = max(0, train_end - first) if scheme == "rolling" else 0
+        folds.append({"fold": k, "train": [(train_start, train_end)], "test": (start, end)})
+    return folds
+
+
+def _segment_capital(history_start, start, end, params):
+    """
+    Capital curve of trading bars [start, end) starting flat.
+
+    Workers are set up by sweep.init_worker, so tasks only carry bar ranges
+    and params.
+
+    The strategy only receives bars [history_start, end), so signals on the
+    scored bars can use warm-up history but never anything after `end`.
+    """
+    target = WORKER["candles_target"].iloc[history_start:end].reset_index(drop=True)
+    anchor = WORKER["candles_anchor"].iloc[history_start:end].reset_index(drop=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        signals = WORKER["generate_signals"](target, anchor, **params)
+    offset = start - history_start
+    df, _ = backtest_signals(signals.iloc[offset:], target.iloc[offset:], fee=WORKER["fee"], engine=WORKER["engine"])
+    return df["capital"].to_numpy()
+
+
+def _evaluate(task):
+    fold, role, segments, history_start, params = task
+    try:
+        # Chain the segments' capital curves so metrics cover them as one account
+        curves, scale = [], 1.0
+        for start, end in segments:
+            capital = _segment_capital(min(history_start, start), start, end, params) * scale
+            scale = capital[-1] / 1000.0
+            curves.append(capital)
+        metrics = compute_metrics(pd.DataFrame({"capital": np.concatenate(curves)}), 1000.0)
+        return {"fold": fold, "role": role, **params, **metrics, "error": None}
+    except Exception as e:
+        return {"fold": fold, "role": role, **params, "error": str(e)}
+
+
+def _history_start(fold, scheme):
+    # Anchored/k-fold strategies see everything before the segment; rolling ones only their window
+    return fold["train"][0][0] if scheme == "rolling" and fold["train"] else 0
+
+
+def run_walk_forward(strategy_name="strategy1", grid=None, params=None, scheme="anchored", n_folds=5,
+                     train_bars=None, purge=24, embargo=24, target="LTC", anchors=("BTC", "ETH"),
+                     timeframe="1H", data_dir="data", fee=0.001, processes=None,
+                     select_by="sharpe_ratio", vectorized=True, engine="vectorized"):
+    """
+    Walk-forward (or purged k-fold) evaluation of one strategy.
+
+    With a `grid`, every point is scored on each fold's train segments and
+    the best one by `select_by` is then scored on that fold's test block;
+    otherwise `params` (default: the strategy's defaults) is used on every
+    fold. All (fold, params) backtests run in one process pool whose workers
+    load the cached candles once.
+
+    Returns:
+    - per-fold DataFrame (fold, bar ranges, chosen params, train and test
+      metrics); params_fallback marks folds where no grid point trained
+      without error, so the first point was used
+    - summary DataFrame with the distribution of each test metric across folds
+    """
+    # Loading here also builds any missing cache entries before the workers start
+    candles_target = Panel.from_cache(target, anchors, timeframe, data_dir).target_frame()
+    folds = make_folds(len(candles_target), n_folds, scheme, train_bars, purge, embargo)
+    points = param_grid(grid) if grid else [dict(params or {})]
+    processes = processes or os.cpu_count() or 1
+
+    print(f"\n🧮 {scheme} walk-forward of {strategy_name}: {len(folds)} folds x {len(points)} params "
+          f"on {processes} workers...")
+    with Pool(processes, initializer=init_worker,
+              initargs=(strategy_name, target, anchors, timeframe, data_dir, fee, vectorized, engine)) as pool:
+        train_tasks = [(f["fold"], "train", f["train"], _history_start(f, scheme), p)
+                       for f in folds if f["train"] for p in points]
+        train = pd.DataFrame(pool.map(_evaluate, train_tasks)) if train_tasks else pd.DataFrame()
+
+        chosen, fallback, train_scores = {}, {}, {}
+        for f in folds:
+            rows = train[train["fold"] == f["fold"]] if len(train) else train
+            rows = rows[rows["error"].isna()] if len(rows) else rows
+            # Without a single clean train score (or without train bars) the first point is used as-is
+            fallback[f["fold"]] = not len(rows)
+            if len(rows):
+                ascending = select_by == "max_drawdown_pct"
+                best = rows.sort_values(select_by, ascending=ascending).iloc[0]
+                chosen[f["fold"]] = {name: best[name] for name in points[0]}
+                train_scores[f["fold"]] = best
+            else:
+                chosen[f["fold"]] = points[0]
+
+        test_tasks = [(f["fold"], "test", [f["test"]], _history_start(f, scheme), chosen[f["fold"]])
+                      for f in folds]
+        test = pd.DataFrame(pool.map(_evaluate, test_tasks))
+
+    failed = test["error"].notna().sum()
+    if failed:
+        print(f"⚠️ {failed} folds raised errors (see 'error' column)")
+
+    per_fold = pd.DataFrame({
+        "fold": [f["fold"] for f in folds],
+        "train_bars": [sum(e - s for s, e in f["train"]) for f in folds],
+        "test_start": [f["test"][0] for f in folds],
+        "test_end": [f["test"][1] for f in folds],
+        "test_from": [candles_target["timestamp"].iloc[f["test"][0]] for f in folds],
+        "test_to": [candles_target["timestamp"].iloc[f["test"][1] - 1] for f in folds],
+        "params": [chosen[f["fold"]] for f in folds],
+        "params_fallback": [fallback[f["fold"]] for f in folds],
+    })
+    if len(train):
+        # reindex: metric columns are missing altogether when every evaluation raised
+        best_train = pd.DataFrame(list(train_scores.values()), columns=train.columns)
+        per_fold = per_fold.merge(best_train.set_index("fold").reindex(columns=METRICS).add_prefix("train_"),
+                                  left_on="fold", right_index=True, how="left")
+    per_fold = per_fold.merge(test.set_index("fold").reindex(columns=METRICS + ["error"]).add_prefix("test_"),
+                              left_on="fold", right_index=True, how="left")
+
+    summary = per_fold[[f"test_{m}" for m in METRICS]].describe().T
+    return per_fold, summary
+
+
+if __name__ == "__main__":
+    per_fold, summary = run_walk_forward("strategy1", grid={"take_profit": [0.03, 0.05, 0.08],
+                                                            "stop_loss": [0.02, 0.03, 0.05]})
+    print(per_fold.to_string(index=False))
+    print(summary.to_string())